@@ -6,18 +6,22 @@ from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, 
     QPushButton, QTabWidget, QSlider, QLabel, QComboBox, QFileDialog, 
     QStatusBar, QSizePolicy, QMessageBox, QStyle, QCheckBox, QMenu,
-    QColorDialog,QDialog
+    QColorDialog,QDialog,QProgressBar
 )
 from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QFont, QPalette, QColor, QIcon, QAction
 from PySide6.QtCore import QUrl
 
+import json
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.signal import find_peaks
 import mplcursors
 import matplotlib.colors as mcolors
 
+from html_export import interactive_page
+from logic import surface_faces
+from metrics import lobe_analysis
+
 # Color scheme constants
 PRIMARY_COLOR = "#135CF8"
 SECONDARY_COLOR = "#F3F3F3"
@@ -108,6 +112,7 @@ class Fig3D(FigureCanvas):
 
         self.ax3 = self.figure.add_subplot(111, projection='3d')
         self._cbar = None
+        self.surface = None  # Poly3DCollection reused by update_surface
         self.cmap = 'plasma'
         self.dark_mode = dark_mode
         # Store original data and view settings
@@ -116,8 +121,87 @@ class Fig3D(FigureCanvas):
         self.original_Z = None
         self.has_data = False
         self.default_view = {'elev': 30, 'azim': 45}
+        # Level of detail: the surface is rebuilt at the resolution a face budget allows
+        self.face_budget = 16384  # faces drawn while rotating, each zoom in step allows 4x more
+        self.export_face_budget = 262144  # "full" resolution of exports, matplotlib can't do much more
+        self.detail = 0
+        self.surface_source = None  # callable(resolution) -> X, Y, Z
+        self.surface_size = None  # points per cut at full resolution
+        self.resolution = None
         self.update_figure_style()
 
+    def lod_resolution_for(self, size, full=False):
+        faces = self.export_face_budget if full else min(self.face_budget * 4 ** self.detail, self.export_face_budget)
+        return max(2, min(size, int(np.sqrt(faces)) + 1))
+
+    def lod_resolution(self, full=False):
+        """Points per cut for the current zoom level, or the full (export) resolution"""
+        return self.lod_resolution_for(self.surface_size, full)
+
+    def plot_source(self, source, size, keep_view=True):
+        """Plot the surface given by source(resolution) at the level of detail of the face budget.
+
+        With keep_view the current surface and colorbar get the new data in place
+        and the camera stays where the user left it.
+        """
+        self.surface_source = source
+        self.surface_size = size
+        if not keep_view:
+            self.detail = 0
+        self.resolution = self.lod_resolution()
+        X, Y, Z = source(self.resolution)
+        if not (keep_view and self.update_surface(X, Y, Z)):
+            self.plot_surface(X, Y, Z)
+
+    def refine(self, full=False):
+        """Rebuild the surface for the current zoom level (or full resolution), keeping the camera"""
+        if self.surface_source is None:
+            return
+        resolution = self.lod_resolution(full)
+        if resolution == self.resolution:
+            return
+        self.resolution = resolution
+        X, Y, Z = self.surface_source(resolution)
+        if self.update_surface(X, Y, Z):
+            return
+        elev, azim = self.ax3.elev, self.ax3.azim
+        limits = (self.ax3.get_xlim(), self.ax3.get_ylim(), self.ax3.get_zlim())
+        self.plot_surface(X, Y, Z)
+        self.ax3.view_init(elev=elev, azim=azim)
+        self.ax3.set_xlim(limits[0])
+        self.ax3.set_ylim(limits[1])
+        self.ax3.set_zlim(limits[2])
+        self.store_original_view()
+        self.draw_idle()
+
+    def update_surface(self, X, Y, Z):
+        """Give new data to the current surface and colorbar, False if they must be recreated.
+
+        The camera and the axes limits set by the user are kept, the colorbar
+        follows the new range of the surface.
+        """
+        if self.surface is None or self.surface not in self.ax3.collections:
+            return False
+        self.original_X, self.original_Y, self.original_Z = X, Y, Z
+        faces = surface_faces(X, Y, Z)
+        self.surface.set_verts(faces)
+        self.surface.set_array(faces[..., 2].mean(axis=-1))  # colored by mean height like plot_surface
+        self.surface.autoscale()
+        self.ax3.auto_scale_xyz(X, Y, Z, had_data=False)  # only the autoscaled axes move
+        self.store_original_view()
+        self.draw_idle()
+        return True
+
+    def print_figure(self, *args, **kwargs):
+        """Exports (toolbar save button, savefig) use the full resolution surface"""
+        if self.surface_source is None or self.resolution == self.lod_resolution(full=True):
+            return super().print_figure(*args, **kwargs)
+        self.refine(full=True)
+        try:
+            return super().print_figure(*args, **kwargs)
+        finally:
+            self.refine()
+
     def store_original_view(self):
         """Store the original 3D view settings"""
         if self.has_data:
@@ -176,8 +260,8 @@ class Fig3D(FigureCanvas):
         self.original_Y = np.array(Y) if Y is not None else None  
         self.original_Z = np.array(Z) if Z is not None else None
         self.has_data = True
-        self.ax3.clear()
         # Safely remove previous colorbar if it exists and is still valid
+        # (before clearing the axes, removing it gives their space back to them)
         if self._cbar:
             try:
                 if hasattr(self._cbar, 'ax') and self._cbar.ax is not None:
@@ -185,12 +269,19 @@ class Fig3D(FigureCanvas):
             except Exception as e:
                 print(f"Warning: Failed to remove previous colorbar: {e}")
             self._cbar = None
+        self.ax3.clear()
+        # every face of a level of detail surface is drawn, bigger grids are strided down to the budget
+        rows, columns = np.shape(Z)
+        limit = rows if self.surface_source is not None else self.lod_resolution_for(max(rows, columns))
         surf = self.ax3.plot_surface(
             X, Y, Z,
+            rcount=min(rows, limit), ccount=min(columns, limit),
             cmap=self.cmap,
             edgecolor='none',
             alpha=0.8
         )
+        # a surface drawing every cell can be updated in place later on
+        self.surface = surf if limit >= max(rows, columns) else None
         self._cbar = self.figure.colorbar(
             surf, ax=self.ax3, shrink=0.5,
             label='Radiation Intensity (linear)'
@@ -202,7 +293,7 @@ class Fig3D(FigureCanvas):
         self.ax3.view_init(elev=30, azim=45)
         # Store the view settings after plotting
         self.store_original_view()
-        self.draw()
+        self.draw_idle()
 
     def change_colormap(self, cmap_name):
         """Change the colormap for the 3D surface plot and redraw if possible."""
@@ -239,6 +330,9 @@ class Fig3D(FigureCanvas):
                     setter((center - half, center + half))
                 # Update stored limits
                 self.store_original_view()
+                # show more detail of the part we zoom into
+                self.detail += 1
+                self.refine()
                 self.draw_idle()
             except Exception as e:
                 print(f"Error in 3D zoom in: {e}")
@@ -261,16 +355,54 @@ class Fig3D(FigureCanvas):
                     setter((center - half, center + half))
                 # Update stored limits
                 self.store_original_view()
+                self.detail = max(0, self.detail - 1)
+                self.refine()
                 self.draw_idle()
             except Exception as e:
                 print(f"Error in 3D zoom out: {e}")
 
     def reset_view(self):
         """Reset to original 3D view"""
-        if self.has_data and all(x is not None for x in [self.original_X, self.original_Y, self.original_Z]):
+        if self.surface_source is not None:
+            self.plot_source(self.surface_source, self.surface_size, keep_view=False)
+        elif self.has_data and all(x is not None for x in [self.original_X, self.original_Y, self.original_Z]):
             # Replot with original data to reset everything
             self.plot_surface(self.original_X, self.original_Y, self.original_Z)
 
+class PlotlyView(QWebEngineView):
+    """Interactive plotly charts of a page loaded once, see html_export.interactive_page.
+
+    The page is loaded on the first figure, after that every figure is handed
+    to Plotly.react in the page: the charts are updated, not reloaded.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.page_requested = False
+        self.loaded = False
+        self.pending = {}  # chart id -> figure JSON waiting for the page, only the newest is kept
+        self.loadFinished.connect(self.on_load_finished)
+
+    def show_figure(self, chart, figure_json):
+        """Show a figure (plotly JSON) in the "polar" or the "surface" chart"""
+        if not self.loaded:
+            self.pending[chart] = figure_json
+            if not self.page_requested:
+                self.page_requested = True
+                self.load(QUrl.fromLocalFile(interactive_page()))
+            return
+        self.page().runJavaScript(f"showFigure({json.dumps(chart)}, {figure_json});")
+
+    def on_load_finished(self, ok):
+        if not ok:
+            print("Warning: the interactive view page could not be loaded")
+            self.page_requested = False
+            return
+        self.loaded = True
+        pending, self.pending = self.pending, {}
+        for chart, figure_json in pending.items():
+            self.show_figure(chart, figure_json)
+
+
 class Fig2D(FigureCanvas):
     def __init__(self, parent=None, figsize=(12, 8), dark_mode=False):
         # Create figure with appropriate size for the application
@@ -295,70 +427,47 @@ class Fig2D(FigureCanvas):
         self.e_data = None  # Initialize e_data
         self.theta_h = None  # Initialize theta_h
         self.theta_e = None
+        # Persistent artists updated by plot_2D, see update_artists
+        self.lines = [None, None]  # H-plane, E-plane
+        self.annotation_boxes = [None, None]
+        self.lobes_shown = False
+        self.lobe_lines = [[], []]  # short lines over each plane's lobes
+        self.lobe_cache = [None, None]  # (data, Lobes) of each plane, see lobes_for
+        self.background = None  # figure without the lines and text boxes, for blitting
+        self.drawn = False
+        self.draw_pending = False
+        self.mpl_connect('draw_event', self.on_draw)
         self.update_figure_style()
 
-    def highlight_lobes_lines(self, ax, phi, data, label_prefix='', main_idx=None):
-            try:
-                if phi is None or data is None or len(phi) != len(data):
-                    print(f"No valid data or angles for {label_prefix} highlighting: phi={phi}, data={data}")
-                    return
-                if np.any(np.isnan(data)) or np.any(np.isinf(data)):
-                    print(f"Invalid values in {label_prefix} data")
-                    return
-
-                print(f"{label_prefix} - phi shape: {np.shape(phi)}, data shape: {np.shape(data)}")
-                peaks, _ = find_peaks(data, distance=max(1, len(data)//36))  # Adjust distance based on data length
-                print(f"{label_prefix} - Found {len(peaks)} peaks at indices: {peaks}")
-                if len(peaks) == 0:
-                    print(f"No peaks found in {label_prefix}")
-                    return
-
-                delta_theta = phi[1] - phi[0] if len(phi) > 1 else np.radians(1)
-                window_degrees = 5
-                window_size = max(1, int(window_degrees / np.degrees(delta_theta)))
-
-                def plot_lobe(idx, color, label):
-                    idx_start = max(0, idx - window_size)
-                    idx_end = min(len(phi), idx + window_size + 1)
-                    highlight_mask = np.full_like(data, np.nan)
-                    highlight_mask[idx_start:idx_end] = data[idx_start:idx_end]
-                    line, = ax.plot(phi, highlight_mask, color=color, linewidth=2, label=label if not any(l.startswith(f"{label_prefix} {label.split()[-1]}") for l in ax.get_legend_handles_labels()[1]) else "")
-                    return line
-
-                if main_idx is not None and 0 <= main_idx < len(data):
-                    selected_main_idx = main_idx
-                else:
-                    peak_values = data[peaks]
-                    selected_main_idx = peaks[np.argmax(peak_values)] if len(peaks) > 0 else  None
-
-                if selected_main_idx is None:
-                    print(f"No valid main lobe index for {label_prefix}")
-                    return
-
-                main_line = plot_lobe(selected_main_idx, 'green', f'{label_prefix} Main Lobe')
-                secondary_indices = [idx for idx in peaks if idx != selected_main_idx]
-                secondary_line = None
-                if secondary_indices:
-                    secondary_line = plot_lobe(secondary_indices[0], 'orange', f'{label_prefix} Secondary Lobe')
-
-                back_angle = (phi[selected_main_idx] + np.pi) % (2 * np.pi)
-                closest_idx = np.argmin(np.abs(phi - back_angle))
-                back_line = plot_lobe(closest_idx, 'purple', f'{label_prefix} Back Lobe')
-
-                base_handles, base_labels = ax.get_legend_handles_labels()
-                lobe_handles = [main_line]
-                if secondary_line:
-                    lobe_handles.append(secondary_line)
-                    lobe_handles.append(back_line)
-                    lobe_labels = [l.get_label() for l in lobe_handles if l.get_label()]
-                    all_handles = [h for h in ax.lines if h.get_label() in ['H-plane', 'E-plane']] + lobe_handles
-                    all_labels = ['H-plane' if 'H-plane' in base_labels else '', 'E-plane' if 'E-plane' in base_labels else ''] + lobe_labels
-                    all_labels = [l for l in all_labels if l]
-                if all_handles and all_labels:
-                    ax.legend(all_handles, all_labels, loc='upper right', bbox_to_anchor=(1.3, 1.0), frameon=True)
-
-            except Exception as e:
-                print(f"Error in highlight_lobes_lines ({label_prefix}): {e}")
+    def lobes_for(self, i, data):
+        """Lobe analysis of plane `i`, computed again only when its data changed"""
+        cached = self.lobe_cache[i]
+        if cached is None or not np.array_equal(cached[0], data):
+            cached = self.lobe_cache[i] = (data, lobe_analysis(data))
+        return cached[1]
+
+    def lobe_segments(self, i, theta, data):
+        """(name, color, angles, values) of the short segments marking the lobes of plane `i`"""
+        lobes = self.lobes_for(i, data)
+        if lobes is None:
+            return []
+        step = theta[1] - theta[0] if len(theta) > 1 else np.radians(1)
+        window = max(1, int(5 / np.degrees(step)))  # 5 degrees on each side
+        offsets = np.arange(-window, window + 1)
+        segments = []
+        for name, color, index in (("Main Lobe", 'green', lobes.main),
+                                   ("Secondary Lobe", 'orange', lobes.secondary),
+                                   ("Back Lobe", 'purple', lobes.back)):
+            if index is not None:
+                indices = index + offsets  # unwrapped, so a segment across 0 deg stays short
+                segments.append((name, color, theta[0] + indices * step, data[indices % len(data)]))
+        return segments
+
+    def plane_legend(self, ax, i):
+        if self.lobe_lines[i]:
+            ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.0), frameon=True)
+        else:
+            ax.legend()
 
     def store_original_limits(self):
         """Store the original axis limits after plotting data"""
@@ -409,80 +518,167 @@ class Fig2D(FigureCanvas):
     def toggle_mode(self, two_plots: bool):
         self.use_two_plots = two_plots
 
-    def plot_2D(self, h, e):
+    def plot_2D(self, h, e=None):
+        """Show the H-plane and E-plane cuts.
+
+        The lines, titles, legends and text boxes are kept between calls and only
+        get the new data, so smoothing ticks or history steps don't rebuild the
+        axes. They are rebuilt when the planes shown or the lobe markers change.
+        """
         # Store original data
         self.original_data_h = np.array(h) if h is not None else None
         self.original_data_e = np.array(e) if e is not None else None
-        self.h_data = np.array(h) if h is not None else None
-        self.e_data = np.array(e) if e is not None else None
+        self.h_data = self.original_data_h
+        self.e_data = self.original_data_e
 
+        # Compute theta only for available data
+        self.theta_h = self.angles_for(self.h_data, self.theta_h)
+        self.theta_e = self.angles_for(self.e_data, self.theta_e)
+
+        if not self.update_artists():
+            self.rebuild_2D()
+
+    @staticmethod
+    def angles_for(data, previous=None):
+        if data is None:
+            return None
+        if previous is not None and len(previous) == len(data):
+            return previous
+        return np.radians(np.arange(len(data)))
+
+    def planes(self):
+        """(axes, label, angles, data, color) of the H and E planes"""
+        return [(self.ax1, 'H-plane', self.theta_h, self.h_data, self.color_h),
+                (self.ax2, 'E-plane', self.theta_e, self.e_data, self.color_e)]
+
+    @staticmethod
+    def annotation_text(label, data):
+        return (f"Max ({label}): {np.max(data):.2f} dB\n"
+                f"Min ({label}): {np.min(data):.2f} dB\n"
+                f"Δ ({label}): {(np.max(data)-np.min(data)):.2f} dB")
+
+    def rebuild_2D(self):
+        """Clear both axes and create every artist again"""
         self.ax1.clear()
         self.ax2.clear()
-
-        # Compute theta only for available data
-        if self.h_data is not None:
-            self.theta_h = np.radians(np.arange(len(self.h_data)))
-        else:
-            self.theta_h = None
-        if self.e_data is not None:
-            self.theta_e = np.radians(np.arange(len(self.e_data)))
-        else:
-            self.theta_e = None
+        self.lines = [None, None]
+        self.lobe_lines = [[], []]
 
         # Plot H-plane if available
         if self.h_data is not None:
-            self.ax1.plot(self.theta_h, self.h_data, color=self.color_h, label='H-plane', linewidth=2)
+            self.lines[0], = self.ax1.plot(self.theta_h, self.h_data, color=self.color_h, label='H-plane', linewidth=2)
             self.ax1.set_title('H-plane')
-            self.ax1.legend()
-            # Show lobes if enabled
-            if self.show_lobes:
-                self.highlight_lobes_lines(self.ax1, self.theta_h, self.h_data, 'H-plane')
 
         # Plot E-plane if available
         if self.e_data is not None:
-            self.ax2.plot(self.theta_e, self.e_data, color=self.color_e, label='E-plane', linewidth=2)
+            self.lines[1], = self.ax2.plot(self.theta_e, self.e_data, color=self.color_e, label='E-plane', linewidth=2)
             self.ax2.set_title("E-plane")
             self.ax2.set_theta_zero_location("N")
             self.ax2.set_theta_direction(1)
-            self.ax2.legend()
+
+        for i, (ax, label, theta, data, _) in enumerate(self.planes()):
+            if data is None:
+                continue
             # Show lobes if enabled
             if self.show_lobes:
-                self.highlight_lobes_lines(self.ax2, self.theta_e, self.e_data, 'E-plane')
+                self.lobe_lines[i] = [ax.plot(x, y, color=color, linewidth=2, label=f"{label} {name}")[0]
+                                      for name, color, x, y in self.lobe_segments(i, theta, data)]
+            self.plane_legend(ax, i)
+        self.lobes_shown = self.show_lobes
 
         # Remove old annotation boxes
-        if hasattr(self, 'annotation_boxes'):
-            for box in self.annotation_boxes:
+        for box in self.annotation_boxes:
+            if box is not None:
                 box.remove()
-        self.annotation_boxes = []
-
-        # Add annotation for H-plane if available
-        if self.h_data is not None:
-            text1 = self.figure.text(
-                0.01, 0.1,
-                f"Max (H-plane): {np.max(self.h_data):.2f} dB\n"
-                f"Min (H-plane): {np.min(self.h_data):.2f} dB\n"
-                f"Δ (H-plane): {(np.max(self.h_data)-np.min(self.h_data)):.2f} dB",
-                fontsize=12, va='center', ha='left',
-                linespacing=1.8,
-                bbox=dict(facecolor='lightgray', alpha=0.5, edgecolor='black')
-            )
-            self.annotation_boxes.append(text1)
-        # Add annotation for E-plane if available
-        if self.e_data is not None:
-            text2 = self.figure.text(
-                0.5, 0.1,
-                f"Max (E-plane): {np.max(self.e_data):.2f} dB\n"
-                f"Min (E-plane): {np.min(self.e_data):.2f} dB\n"
-                f"Δ (E-plane): {(np.max(self.e_data)-np.min(self.e_data)):.2f} dB",
-                fontsize=12, va='center', ha='left',
-                linespacing=1.8,
-                bbox=dict(facecolor='lightgray', alpha=0.5, edgecolor='black')
-            )
-            self.annotation_boxes.append(text2)
+        self.annotation_boxes = [None, None]
+
+        # Add annotation for the planes available
+        for i, (x, (_, label, _, data, _)) in enumerate(zip((0.01, 0.5), self.planes())):
+            if data is not None:
+                self.annotation_boxes[i] = self.figure.text(
+                    x, 0.1,
+                    self.annotation_text(label, data),
+                    fontsize=12, va='center', ha='left',
+                    linespacing=1.8,
+                    bbox=dict(facecolor='lightgray', alpha=0.5, edgecolor='black')
+                )
 
         self.update_figure_style()
         self.store_original_limits()
-        self.draw()
+        self.request_draw()
+
+    def update_artists(self):
+        """Give the new data to the existing artists, False if they have to be rebuilt"""
+        planes = self.planes()
+        if self.show_lobes != self.lobes_shown \
+                or [line is None for line in self.lines] != [data is None for *_, data, _ in planes]:
+            return False
+        segments = [self.lobe_segments(i, theta, data) if self.show_lobes and data is not None else []
+                    for i, (_, _, theta, data, _) in enumerate(planes)]
+        if [len(plane) for plane in segments] != [len(lines) for lines in self.lobe_lines]:
+            return False  # a lobe appeared or went away
+
+        redraw = False
+        for i, ((ax, label, theta, data, color), line, box) in enumerate(zip(planes, self.lines, self.annotation_boxes)):
+            if data is None:
+                continue
+            line.set_data(theta, data)
+            box.set_text(self.annotation_text(label, data))
+            for lobe_line, (_, _, x, y) in zip(self.lobe_lines[i], segments[i]):
+                lobe_line.set_data(x, y)
+            if line.get_color() != color:
+                line.set_color(color)
+                self.plane_legend(ax, i)  # the legend handle is a copy of the line
+                redraw = True
+            redraw |= self.fit_radial_limits(ax, data)
+        self.store_original_limits()
+
+        if redraw or not self.blit_artists():
+            self.request_draw()
+        return True
+
+    def fit_radial_limits(self, ax, data):
+        """Keep the radial limits while the data still fills them, else autoscale. True if they changed"""
+        low, high = ax.get_ylim()
+        data_min, data_max = np.min(data), np.max(data)
+        if low <= data_min and data_max <= high and data_max - data_min >= 0.75 * (high - low):
+            return False
+        ax.relim()
+        ax.autoscale(axis='y')
+        return ax.get_ylim() != (low, high)
+
+    def request_draw(self):
+        """Full redraw on the next event loop pass, several requests make a single draw"""
+        self.draw_pending = True
+        self.draw_idle()
+
+    def on_draw(self, event):
+        # anything may have moved, the blitting background is taken again when needed
+        self.draw_pending = False
+        self.drawn = True
+        self.background = None
+
+    def blit_artists(self):
+        """Draw only the lines and text boxes over a cached background, False if it can't be done"""
+        if not self.drawn or self.draw_pending:
+            return False
+        artists = [artist for artist in self.lines + self.annotation_boxes + sum(self.lobe_lines, [])
+                   if artist is not None]
+        if self.background is None:
+            # render everything else once and keep it
+            for artist in artists:
+                artist.set_visible(False)
+            try:
+                self.figure.draw(self.get_renderer())
+            finally:
+                for artist in artists:
+                    artist.set_visible(True)
+            self.background = self.copy_from_bbox(self.figure.bbox)
+        self.restore_region(self.background)
+        for artist in artists:
+            self.figure.draw_artist(artist)
+        self.blit(self.figure.bbox)
+        return True
 
 
     def zoom_in(self, factor=0.8):
@@ -535,11 +731,11 @@ class Fig2D(FigureCanvas):
 
     def reset_view(self):
         """Reset to original view after plotting"""
-        if self.has_data and self.original_data_h is not None and self.original_data_e is not None:
-            # Replot with original data to reset everything
-            self.plot_2D(self.original_data_h, self.original_data_e)
-        elif self.original_data_e is  None:
-            self.plot_2D(self.original_data_h)
+        if self.original_data_h is not None or self.original_data_e is not None:
+            # Rebuild with original data to reset everything, limits included
+            self.h_data = self.original_data_h
+            self.e_data = self.original_data_e
+            self.rebuild_2D()
 
 class Ui_Window:
     def setupUi(self, MainWindow):
@@ -580,6 +776,13 @@ class Ui_Window:
         self.statusbar = QStatusBar(MainWindow)
         MainWindow.setStatusBar(self.statusbar)
         self.statusbar.showMessage("Ready")
+        # Progress of background jobs such as file imports
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.hide()
+        self.statusbar.addPermanentWidget(self.progress_bar)
         
         # Apply initial styles
         self.apply_styles(MainWindow)
@@ -653,6 +856,11 @@ class Ui_Window:
         self.tab_widget.addTab(self.tab2, "3D Visualization")
         self.setup_tab2()
 
+        # Tab 3: interactive plotly charts, filled by Window
+        self.tab3 = QWidget()
+        self.tab3_layout = QVBoxLayout(self.tab3)
+        self.tab_widget.addTab(self.tab3, "Interactive View")
+
     def setup_tab1(self):
         tab1_layout = QVBoxLayout(self.tab1)
         
@@ -941,11 +1149,10 @@ class Window(QMainWindow):
         super().__init__()
         self.view = Ui_Window()
         self.view.setupUi(self)
-        #create a web window for the online plot 
-        
         # Create figures with appropriate sizes for the application
         self.fig2D = Fig2D(self, figsize=(10, 6), dark_mode=self.view.dark_mode)
         self.fig3D = Fig3D(self, figsize=(8, 6), dark_mode=self.view.dark_mode)
+        self.online_view = PlotlyView(self)
 
         # Create custom toolbars with reset functionality
         self.setup_custom_toolbars()
@@ -955,6 +1162,7 @@ class Window(QMainWindow):
         self.view.tab1_canvas_layout.addWidget(self.fig2D)
         self.view.tab2_canvas_layout.addWidget(self.toolbar2)
         self.view.tab2_canvas_layout.addWidget(self.fig3D)
+        self.view.tab3_layout.addWidget(self.online_view)
         
         # Connect theme toggle
         self.view.theme_toggle.stateChanged.connect(self.toggle_theme)
@@ -1006,17 +1214,18 @@ class Window(QMainWindow):
                  return file_name
     def file_history(self, mode):
         """
-        Open a file dialog for saving or opening a JSON file, depending on mode.
-        mode: 'save' or 'open'
+        Open a file dialog for saving or opening a project file, depending on mode.
+        mode: 'save' or 'open' (JSON projects of older versions can be opened too)
         Returns the selected file path or None if cancelled.
         """
         file_dialog = QFileDialog(self)
-        file_dialog.setNameFilter("JSON Files (*.json)")
-        file_dialog.setDefaultSuffix("json")
+        file_dialog.setDefaultSuffix("arproj")
         if mode == 'save':
+            file_dialog.setNameFilter("AntennaRay Projects (*.arproj)")
             file_dialog.setAcceptMode(QFileDialog.AcceptSave)
             dialog_title = "Save History As"
         elif mode == 'open':
+            file_dialog.setNameFilter("AntennaRay Projects (*.arproj *.json)")
             file_dialog.setAcceptMode(QFileDialog.AcceptOpen)
             dialog_title = "Open History File"
         else:
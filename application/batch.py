@@ -0,0 +1,132 @@
+"""
+Headless batch processing of measurement files, no display needed.
+
+Every .atn/.txt file of a folder is read, smoothed and normalized by a Model
+in a pool of worker processes, and the metrics of each cut are written to a
+CSV, Parquet or Excel summary (one row per cut). E.g.:
+    python batch.py measurements/ -o summary.csv --smooth 5 --jobs 8
+"""
+import argparse
+import csv
+import importlib.util
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from logic import Model
+from metrics import Metrics, cut_directivity, pattern_metrics
+
+EXTENSIONS = (".atn", ".txt")
+COLUMNS = ("file", "cut", "points") + Metrics._fields + ("directivity", "error")
+# summary extension -> modules it needs, one of each tuple
+SUMMARY_FORMATS = {".csv": [], ".parquet": [("pandas",), ("pyarrow", "fastparquet")],
+                   ".xlsx": [("pandas",), ("openpyxl",)]}
+
+
+def find_files(folder, recursive=False):
+    """Measurement files of `folder`, sorted"""
+    if recursive:
+        paths = [os.path.join(root, name) for root, _, names in os.walk(folder) for name in names]
+    else:
+        paths = [os.path.join(folder, name) for name in os.listdir(folder)]
+    return sorted(path for path in paths if path.lower().endswith(EXTENSIONS) and os.path.isfile(path))
+
+
+def process_file(path, smooth=0, normalize=False):
+    """Summary rows of one file, a single row with the error if it can't be read"""
+    try:
+        model = Model()
+        model.read_file(path)
+        if model.cuts is None:
+            raise ValueError("no data")
+        if smooth:
+            model.smooth2D(smooth)
+        if normalize:
+            model.normalize("2D")
+        cuts = model.cuts2D
+        metrics = pattern_metrics(cuts)
+        # the pattern data_3D would build from the H and E planes
+        directivity = float(cut_directivity(cuts[0], cuts[1] if len(cuts) > 1 else None)[0])
+    except Exception as e:
+        return [dict({column: None for column in COLUMNS}, file=path, error=str(e) or type(e).__name__)]
+    rows = []
+    for cut in range(len(cuts)):
+        row = {"file": path, "cut": cut, "points": cuts.shape[1], "directivity": directivity, "error": None}
+        row.update((name, float(values[cut])) for name, values in zip(Metrics._fields, metrics))
+        rows.append(row)
+    return rows
+
+
+def process_files(paths, smooth=0, normalize=False, jobs=None):
+    """Summary rows of every file, in the order of `paths`"""
+    work = partial(process_file, smooth=smooth, normalize=normalize)
+    if jobs == 1:
+        results = map(work, paths)
+    else:
+        jobs = jobs or os.cpu_count() or 1
+        # many small files: hand them to the workers in chunks
+        chunksize = max(1, len(paths) // (4 * jobs))
+        with ProcessPoolExecutor(jobs) as executor:
+            results = list(executor.map(work, paths, chunksize=chunksize))
+    return [row for rows in results for row in rows]
+
+
+def summary_error(path):
+    """Why a summary can't be written to `path` (its format or a missing module), None if it can"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SUMMARY_FORMATS:
+        return f"unsupported summary format {extension or path!r}, use one of {', '.join(SUMMARY_FORMATS)}"
+    for modules in SUMMARY_FORMATS[extension]:
+        if not any(importlib.util.find_spec(module) for module in modules):
+            return (f"writing {extension} needs {' or '.join(modules)} "
+                    f"(pip install {' '.join(group[0] for group in SUMMARY_FORMATS[extension])})")
+    return None
+
+
+def write_summary(path, rows):
+    """Write the rows as CSV, Parquet or Excel after the extension of `path`, see summary_error"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".parquet", ".xlsx"):
+        import pandas as pd
+        frame = pd.DataFrame(rows, columns=COLUMNS)
+        if extension == ".parquet":
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_excel(path, index=False)
+        return
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="folder of .atn/.txt measurement files")
+    parser.add_argument("-o", "--output", default="summary.csv", help="summary file, .csv, .parquet or .xlsx")
+    parser.add_argument("-r", "--recursive", action="store_true", help="include the sub-folders")
+    parser.add_argument("--smooth", type=int, default=0, help="smoothing slider value, 0 for none")
+    parser.add_argument("--normalize", action="store_true", help="shift every cut so its maximum is 0 dB")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+    # checked before any file is processed
+    error = summary_error(args.output)
+    if error:
+        parser.error(error)
+
+    paths = find_files(args.folder, args.recursive)
+    if not paths:
+        print(f"No measurement files in {args.folder}", file=sys.stderr)
+        return 1
+    rows = process_files(paths, args.smooth, args.normalize, args.jobs)
+    write_summary(args.output, rows)
+    failed = [row for row in rows if row["error"]]
+    for row in failed:
+        print(f"Warning: skipped {row['file']}: {row['error']}", file=sys.stderr)
+    print(f"{len(paths) - len(failed)}/{len(paths)} files, {len(rows) - len(failed)} cuts -> {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
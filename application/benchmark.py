@@ -0,0 +1,590 @@
+"""
+Micro benchmarks for the data pipeline.
+
+Run from the application folder, e.g.:
+    python benchmark.py parser
+    python benchmark.py all
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from cache import ParseCache
+from logic import Model
+from smoothing import circular_savgol
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "files", "CRMG1SG12019.atn")
+
+
+def best_of(func, repeat=5):
+    """Return the best wall time of several runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def write_atn(path, step=0.1, cuts=2, sample=SAMPLE_FILE):
+    """Write an .atn file with the sample's header and `cuts` cuts resampled to `step` degrees"""
+    model = Model()
+    model.read_file(sample)
+    source = np.radians(np.arange(len(model.h_plane)))
+    angles = np.radians(np.arange(0, 360, step))
+    with open(path, 'w') as file:
+        file.write("12 20.0 0.0 0\nIt is not specified.\n")
+        for i in range(cuts):
+            plane = model.h_plane if i % 2 == 0 else model.e_plane
+            values = np.interp(angles, source, plane, period=2 * np.pi)
+            file.write("11-04-2019\n14:14:26\n")
+            file.write("\n".join(f"{v:.2f}" for v in values))
+            file.write("\n")
+    return path
+
+
+def read_file_loop(file_path):
+    """The original line-by-line reader, kept as the reference for the parser benchmark"""
+    h_plane = []
+    e_plane = []
+    reading_started = False
+    reading_h_plane = True
+    with open(file_path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                value = float(line)
+                reading_started = True
+                if reading_h_plane:
+                    h_plane.append(value)
+                else:
+                    e_plane.append(value)
+            except ValueError:
+                if reading_started:
+                    reading_h_plane = False
+                continue
+    h_plane = np.array(h_plane) if len(h_plane) > 0 else None
+    e_plane = np.array(e_plane) if len(e_plane) > 0 else None
+    return h_plane, e_plane
+
+
+def bench_parser(args):
+    """Vectorized Model.read_file against the original per-line loop"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for cuts in (2, 36):
+            path = write_atn(os.path.join(tmp, f"pattern_{cuts}.atn"), step=0.1, cuts=cuts)
+            model = Model()
+            loop = best_of(lambda: read_file_loop(path))
+            vectorized = best_of(lambda: model.read_file(path))
+            print(f"{cuts:3d} cuts x 3600 pts   loop {loop * 1e3:8.2f} ms   "
+                  f"vectorized {vectorized * 1e3:8.2f} ms   speedup x{loop / vectorized:.1f}")
+
+
+def bench_cache(args):
+    """Cold parse against a warm ParseCache hit (hash check + memory-map)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ParseCache(os.path.join(tmp, "cache"))
+        for cuts in (2, 36, 360):
+            path = write_atn(os.path.join(tmp, f"pattern_{cuts}.atn"), step=0.1, cuts=cuts)
+            model = Model()
+            cold = best_of(lambda: model.read_file(path))
+            model.read_file(path, cache=cache)  # fills the cache
+
+            def warm():
+                model.read_file(path, cache=cache)
+                model.cuts.sum()  # touch the mapped pages
+            warm_time = best_of(warm)
+            print(f"{cuts:4d} cuts x 3600 pts ({os.path.getsize(path) / 1e6:5.1f} MB)   "
+                  f"parse {cold * 1e3:8.2f} ms   cache {warm_time * 1e3:7.2f} ms   speedup x{cold / warm_time:.1f}")
+
+
+def bench_smoothing(args):
+    """circular_savgol on the whole block against savgol_filter called once per cut"""
+    from scipy.signal import savgol_filter
+    rng = np.random.default_rng(0)
+    for cuts, points in ((2, 360), (2, 3600), (36, 3600)):
+        block = rng.normal(size=(cuts, points))
+        for window in (5, 15, 101):
+            per_cut = best_of(lambda: [savgol_filter(cut, window_length=window, polyorder=2) for cut in block])
+            circular = best_of(lambda: circular_savgol(block, window))
+            print(f"{cuts:3d} cuts x {points:4d} pts  window {window:3d}   savgol_filter {per_cut * 1e3:7.3f} ms   "
+                  f"circular {circular * 1e3:7.3f} ms   speedup x{per_cut / circular:.1f}")
+
+
+def data_3D_meshgrid(h_plane, e_plane):
+    """The original meshgrid/outer implementation of Model.data_3D"""
+    size = len(h_plane)
+    theta = np.linspace(0, 2 * np.pi, size)
+    phi = np.linspace(0, np.pi, size)
+    theta, phi = np.meshgrid(theta, phi)
+    r = (np.outer(h_plane, np.ones_like(e_plane)) + np.outer(np.ones_like(h_plane), e_plane)) / 2
+    X = r * np.sin(phi) * np.cos(theta)
+    Y = r * np.sin(phi) * np.sin(theta)
+    Z = r * np.cos(phi)
+    return X, Y, Z
+
+
+def peak_memory(func):
+    """Peak traced allocation while running func, in MB"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def bench_surface(args):
+    """Model.data_3D (broadcast, cached trig tables, memoized) against the meshgrid version"""
+    from logic import sphere_tables
+    rng = np.random.default_rng(0)
+    for size in (360, 720, 3600):
+        model = Model()
+        model.set_cuts(rng.normal(size=(2, size)))
+        h_plane, e_plane = model.h_plane3D, model.e_plane3D
+        repeat = 3 if size > 1000 else 5
+        legacy = best_of(lambda: data_3D_meshgrid(h_plane, e_plane), repeat)
+        legacy_mb = peak_memory(lambda: data_3D_meshgrid(h_plane, e_plane))
+        print(f"N={size:4d}  meshgrid         {legacy * 1e3:9.2f} ms  peak {legacy_mb:8.1f} MB")
+        for dtype in (np.float64, np.float32):
+            def fresh():
+                model.surface = None
+                return model.data_3D(dtype)
+            sphere_tables.cache_clear()
+            cold_mb = peak_memory(fresh)
+            fresh_time = best_of(fresh, repeat)
+            memo = best_of(lambda: model.data_3D(dtype), repeat)
+            print(f"        broadcast {np.dtype(dtype).name:7s} {fresh_time * 1e3:9.2f} ms  peak {cold_mb:8.1f} MB"
+                  f"   memoized {memo * 1e6:6.1f} us   speedup x{legacy / fresh_time:.1f}")
+
+
+def qt_app():
+    """QApplication for the drawing benchmarks, offscreen unless a platform is set"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtCore import QCoreApplication, Qt
+    from PySide6.QtWidgets import QApplication
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)  # UI_file imports Qt WebEngine afterwards
+    return QApplication.instance() or QApplication([])
+
+
+def bench_scrub(args):
+    """Frames per second while scrubbing the 2D smoothing slider: axes rebuild against artist updates"""
+    app = qt_app()
+    from UI_file import Fig2D
+    model = Model()
+    model.read_file(SAMPLE_FILE)
+    values = list(range(16)) + list(range(15, -1, -1))
+    blocks = [model.smoothed_2D(value) for value in values]  # only the drawing is timed
+    canvas = Fig2D(figsize=(10, 6))
+    canvas.resize(800, 480)
+    canvas.show()
+
+    def rebuild(h, e):
+        canvas.h_data, canvas.e_data = h, e
+        canvas.rebuild_2D()
+
+    for name, plot in (("rebuild", rebuild), ("update", canvas.plot_2D)):
+        canvas.plot_2D(*blocks[0])
+        canvas.rebuild_2D()
+        app.processEvents()
+        start = time.perf_counter()
+        for _ in range(3):
+            for block in blocks:
+                plot(block[0], block[1])
+                app.processEvents()  # the frame is on screen
+        fps = 3 * len(blocks) / (time.perf_counter() - start)
+        print(f"{name:8s} {fps:7.1f} frames/s")
+
+
+def bench_surface_update(args):
+    """3D smoothing toggle: replot (clear, new surface and colorbar) against the in-place update"""
+    qt_app()
+    from UI_file import Fig3D
+    with tempfile.TemporaryDirectory() as tmp:
+        model = Model()
+        model.read_file(write_atn(os.path.join(tmp, "pattern.atn"), step=0.1))
+    canvas = Fig3D(figsize=(8, 6))
+    for detail in (0, 1, 2):
+        canvas.detail = detail
+        resolution = canvas.lod_resolution_for(model.cuts.shape[1])
+        surfaces = []
+        for smooth in (False, True):
+            model.smooth3D(smooth)
+            surfaces.append(model.data_3D(resolution=resolution))
+        canvas.plot_surface(*surfaces[0])
+        canvas.draw()
+        toggles = iter(range(10 ** 6))
+        for name, update in (("replot", canvas.plot_surface), ("in place", canvas.update_surface)):
+            call = best_of(lambda: update(*surfaces[next(toggles) % 2]), 3)
+
+            def frame():
+                update(*surfaces[next(toggles) % 2])
+                canvas.draw()
+            print(f"{(resolution - 1) ** 2:6d} faces   {name:8s}  update {call * 1e3:7.1f} ms   "
+                  f"update + draw {best_of(frame, 3) * 1e3:7.1f} ms")
+
+
+def bench_history(args):
+    """Memory per undo step: array copies (old listHistory), snapshots, operation log with checkpoints"""
+    from history import History, Snapshot, replay
+    from logic import smoothing_cache
+    with tempfile.TemporaryDirectory() as tmp:
+        model = Model()
+        model.read_file(write_atn(os.path.join(tmp, "pattern.atn"), step=0.1))
+    settings = {"h_color": "blue", "e_color": "red", "show_lobes": False, "smooth_2d": 0,
+                "smooth_3d": False, "display_mode": True, "normalized": False}
+    loaded = Snapshot(model.cuts, model.dataset, model.cuts2D, model.cuts3D, **settings)
+    steps = 500
+    operations = []
+    for step in range(steps):
+        kind = step % 4
+        if kind == 3:
+            operations.append(("normalized", step % 8 == 3))
+        elif kind == 2:
+            operations.append(("smooth_3d", step % 8 == 2))
+        else:
+            operations.append(("smooth_2d", (step * 3) % 16))
+
+    def copies():
+        states = [loaded]
+        for operation in operations:
+            state = replay(states[-1], [operation])
+            states[-1] = tuple(block[row].copy() for block in (states[-1].cuts2D, states[-1].cuts3D)
+                               for row in (0, 1))
+            states.append(state)
+        return states
+
+    def history(checkpoint_every):
+        store = History(max_bytes=2 ** 40, checkpoint_every=checkpoint_every)
+        state = loaded
+        store.push(("load", None), state)
+        for operation in operations:
+            state = replay(state, [operation])
+            store.push(operation, state)
+        return store
+
+    for name, build in (("array copies", copies), ("snapshots", lambda: history(1)),
+                        ("operation log", lambda: history(16))):
+        smoothing_cache.clear()
+        tracemalloc.start()
+        kept = build()
+        smoothing_cache.clear()  # only what the history keeps is counted
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        line = f"{name:14s} {retained / steps / 1e3:8.1f} kB/step   total {retained / 1e6:7.2f} MB"
+        if isinstance(kept, History):
+            start = time.perf_counter()
+            while kept.can_go_back():
+                kept.back()
+            line += f"   undo {(time.perf_counter() - start) / steps * 1e3:6.3f} ms/step"
+        print(line)
+
+
+def legacy_project(history):
+    """The indented JSON project of older versions: every state's planes as lists"""
+    from history import LEGACY_KEYS
+    lists = {key: [] for key in LEGACY_KEYS}
+    for index in range(len(history)):
+        state = history.state(index)
+        for key, block in (("2D", state.cuts2D), ("3D", state.cuts3D)):
+            for row, plane in enumerate(("h_plane", "e_plane")):
+                lists[plane + key].append(block[row].tolist())
+        for key in LEGACY_KEYS[4:]:
+            lists[key].append(getattr(state, key))
+    return lists
+
+
+def bench_project(args):
+    """Project save/load: legacy indented JSON against the binary container"""
+    import json
+    from history import History, Snapshot, replay
+    from project import read_project, write_project
+    settings = {"h_color": "blue", "e_color": "red", "show_lobes": False, "smooth_2d": 0,
+                "smooth_3d": False, "display_mode": True, "normalized": False}
+    with tempfile.TemporaryDirectory() as tmp:
+        for step, states in ((1.0, 50), (0.1, 50), (0.1, 400)):
+            model = Model()
+            model.read_file(write_atn(os.path.join(tmp, "pattern.atn"), step=step))
+            history = History(max_bytes=2 ** 40)
+            state = Snapshot(model.cuts, model.dataset, model.cuts2D, model.cuts3D, **settings)
+            history.push(("load", None), state)
+            for i in range(states - 1):
+                operation = ("smooth_2d", (i * 3) % 16) if i % 3 else ("smooth_3d", i % 2 == 0)
+                state = replay(state, [operation])
+                history.push(operation, state)
+            legacy_path = os.path.join(tmp, "project.json")
+            binary_path = os.path.join(tmp, "project.arproj")
+
+            def save_legacy():
+                with open(legacy_path, 'w') as file:
+                    json.dump(legacy_project(history), file, indent=2)
+
+            def load_legacy():
+                read_project(legacy_path).current()
+
+            def load_binary():
+                read_project(binary_path).current().cuts2D.sum()  # touch the mapped pages
+            results = []
+            for save, load, path in ((save_legacy, load_legacy, legacy_path),
+                                     (lambda: write_project(binary_path, history), load_binary, binary_path)):
+                results.append((best_of(save, 3), best_of(load, 3), os.path.getsize(path)))
+            print(f"{model.cuts.shape[1]:5d} pts x {states:3d} states")
+            for name, (save, load, size) in zip(("json", "binary"), results):
+                print(f"    {name:6s} {size / 1e6:8.2f} MB   save {save * 1e3:8.1f} ms   load {load * 1e3:8.1f} ms")
+
+
+def bench_project_open(args):
+    """Time to the first plotted state of a project: lazy checkpoints against loading them all"""
+    import json
+    from history import History, Snapshot, replay
+    from project import read_project, write_project
+    settings = {"h_color": "blue", "e_color": "red", "show_lobes": False, "smooth_2d": 0,
+                "smooth_3d": False, "display_mode": True, "normalized": False}
+    with tempfile.TemporaryDirectory() as tmp:
+        model = Model()
+        model.read_file(write_atn(os.path.join(tmp, "pattern.atn"), step=0.1, cuts=8))
+        for states in (50, 200, 1000):
+            history = History(max_bytes=2 ** 40)
+            state = Snapshot(model.cuts, model.dataset, model.cuts2D, model.cuts3D, **settings)
+            history.push(("load", None), state)
+            for i in range(states - 1):
+                operation = ("smooth_2d", (i * 3) % 16) if i % 2 else ("normalized", i % 4 == 0)
+                state = replay(state, [operation])
+                history.push(operation, state)
+            binary_path = os.path.join(tmp, "project.arproj")
+            legacy_path = os.path.join(tmp, "project.json")
+            write_project(binary_path, history)
+            paths = [("binary", binary_path)]
+            if states <= 200:  # every state in full, the JSON of a long history takes minutes
+                with open(legacy_path, 'w') as file:
+                    json.dump(legacy_project(history), file)
+                paths.append(("json", legacy_path))
+
+            def first_state(path, eager):
+                opened = read_project(path, max_bytes=2 ** 40, mapped=False)
+                if eager:
+                    for index in opened.checkpoint_indices():
+                        opened.checkpoint(index)
+                return opened.current()
+            line = f"{states:5d} states"
+            for name, path in paths:
+                eager = best_of(lambda: first_state(path, True), 3)
+                lazy = best_of(lambda: first_state(path, False), 3)
+                line += f"   {name} all {eager * 1e3:8.1f} ms  lazy {lazy * 1e3:7.1f} ms"
+            print(line)
+
+
+def bench_autosave(args):
+    """Autosave: time the GUI thread spends per action against rewriting the project each time"""
+    from history import History, Snapshot, replay
+    from journal import Journal
+    from project import write_project
+    settings = {"h_color": "blue", "e_color": "red", "show_lobes": False, "smooth_2d": 0,
+                "smooth_3d": False, "display_mode": True, "normalized": False}
+    with tempfile.TemporaryDirectory() as tmp:
+        model = Model()
+        model.read_file(write_atn(os.path.join(tmp, "pattern.atn"), step=0.1, cuts=8))
+        for states in (100, 1000):
+            history = History(max_bytes=2 ** 40)
+            state = Snapshot(model.cuts, model.dataset, model.cuts2D, model.cuts3D, **settings)
+            history.push(("load", None), state)
+            operations = []
+            for i in range(states - 1):
+                operation = ("smooth_2d", (i * 3) % 16) if i % 2 else ("normalized", i % 4 == 0)
+                state = replay(state, [operation])
+                operations.append((operation, state))
+            journal = Journal(os.path.join(tmp, f"autosave-{states}"))
+            journal.start(history)
+            journal.flush()
+            gui = 0.0
+            start = time.perf_counter()
+            for operation, state in operations:
+                begin = time.perf_counter()
+                history.push(operation, state)
+                journal.pushed(history)
+                gui += time.perf_counter() - begin
+            journal.flush()
+            total = time.perf_counter() - start
+            journal.close()
+            save = best_of(lambda: write_project(os.path.join(tmp, "project.arproj"), history), 3)
+            print(f"{states:5d} states   journal: GUI {gui / len(operations) * 1e6:6.1f} us/action, "
+                  f"all on disk after {total * 1e3:7.1f} ms   full save per action {save * 1e3:7.1f} ms")
+
+
+def bench_metrics(args):
+    """Pattern metrics of many cuts: one vectorized pass against one call per cut"""
+    from metrics import pattern_metrics
+    model = Model()
+    model.read_file(SAMPLE_FILE)
+    rng = np.random.default_rng(0)
+    for cuts, size in ((1000, 360), (4000, 360), (1000, 3600)):
+        source = np.radians(np.arange(model.cuts.shape[1]))
+        angles = np.radians(np.arange(size) * 360 / size)
+        base = np.interp(angles, source, model.h_plane, period=2 * np.pi)
+        block = base + rng.normal(scale=0.2, size=(cuts, size))
+        vectorized = best_of(lambda: pattern_metrics(block), 3)
+        looped = best_of(lambda: [pattern_metrics(cut) for cut in block], 1)
+        print(f"{cuts:5d} cuts x {size:4d} pts   vectorized {vectorized * 1e3:7.1f} ms "
+              f"({vectorized / cuts * 1e6:5.1f} us/cut)   per cut {looped * 1e3:8.1f} ms")
+
+
+def bench_directivity(args):
+    """Directivity of a production batch: cached quadrature weights against a grid per pattern"""
+    from scipy.integrate import trapezoid
+    from metrics import cut_directivity, grid_directivity
+
+    def grid_per_pattern(h_plane, e_plane):
+        # the straightforward way: build the data_3D grid and integrate it
+        theta = np.linspace(0, np.pi, len(h_plane))
+        phi = np.linspace(0, 2 * np.pi, len(e_plane))
+        power = 10 ** ((h_plane[:, np.newaxis] + e_plane[np.newaxis, :]) / 20)
+        integral = trapezoid(trapezoid(power, phi, axis=1) * np.sin(theta), theta)
+        return 10 * np.log10(4 * np.pi * power.max() / integral)
+    rng = np.random.default_rng(0)
+    for patterns, size in ((10000, 360), (10000, 3600)):
+        h_planes = rng.normal(size=(patterns, size)).cumsum(axis=1) * 0.1
+        e_planes = rng.normal(size=(patterns, size)).cumsum(axis=1) * 0.1
+        vectorized = best_of(lambda: cut_directivity(h_planes, e_planes), 3)
+        sample = 20
+        looped = best_of(lambda: [grid_per_pattern(h, e) for h, e in zip(h_planes[:sample], e_planes[:sample])], 1)
+        print(f"{patterns:5d} patterns x {size:4d} pts (cuts)   {vectorized * 1e3:8.1f} ms   "
+              f"grid per pattern ~{looped / sample * patterns:8.1f} s")
+    grids = rng.normal(size=(1000, 181, 361))
+    full = best_of(lambda: grid_directivity(grids), 3)
+    print(f" 1000 patterns x 181 x 361 (full grid)   {full * 1e3:8.1f} ms")
+
+
+def bench_batch(args):
+    """Batch summary of a folder of measurements: one process against a process pool"""
+    from batch import find_files, process_files
+    with tempfile.TemporaryDirectory() as tmp:
+        write_atn(os.path.join(tmp, "pattern-0.atn"), step=0.1, cuts=4)
+        for i in range(1, 200):
+            shutil.copy(os.path.join(tmp, "pattern-0.atn"), os.path.join(tmp, f"pattern-{i}.atn"))
+        paths = find_files(tmp)
+        serial = best_of(lambda: process_files(paths, smooth=5, jobs=1), 1)
+        pooled = best_of(lambda: process_files(paths, smooth=5), 1)
+        print(f"{len(paths)} files x 4 cuts x 3600 pts   1 process {serial:6.2f} s   "
+              f"{os.cpu_count()} processes {pooled:6.2f} s")
+
+
+def bench_export(args):
+    """Offscreen report images: one figure template reused against new figures per file"""
+    import export
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [write_atn(os.path.join(tmp, f"pattern-{i}.atn"), step=1.0) for i in range(20)]
+        folder = os.path.join(tmp, "report")
+        os.makedirs(folder)
+
+        def fresh():
+            for path in paths:
+                export.ReportFigures().export(path, folder)
+        reused = best_of(lambda: export.export_files(paths, folder, jobs=1), 1)
+        new = best_of(fresh, 1)
+        pooled = best_of(lambda: export.export_files(paths, folder), 1)
+        for name, seconds in (("reused figures", reused), ("new figures per file", new),
+                              (f"pool of {os.cpu_count()}", pooled)):
+            print(f"{name:22s} {seconds / len(paths) * 1e3:7.1f} ms/file   "
+                  f"{2 * len(paths) / seconds * 60:6.0f} PNG images/min")
+
+
+def bench_html(args):
+    """Plotly HTML views: plotly.js inlined with float64 data against the shared cached bundle with float32"""
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    from html_export import float32, plotly_js, write_html
+    plotly_js()  # written once, on the first export of a session
+    with tempfile.TemporaryDirectory() as tmp:
+        model = Model()
+        model.read_file(write_atn(os.path.join(tmp, "pattern.atn"), step=0.1))
+        h_plane, e_plane = model.h_plane, model.e_plane
+        theta = np.linspace(0, 360, len(h_plane))
+        figures = {
+            "2D": lambda convert: go.Figure([go.Scatterpolar(r=convert(h_plane), theta=convert(theta)),
+                                             go.Scatterpolar(r=convert(e_plane), theta=convert(theta))]),
+            "3D": lambda convert: go.Figure([go.Surface(**{key: convert(values) for key, values in zip(
+                "xyz", model.data_3D(resolution=129))})]),
+        }
+        path = os.path.join(tmp, "view.html")
+        for name, figure in figures.items():
+            inline = best_of(lambda: pio.write_html(figure(np.asarray), file=path, auto_open=False), 3)
+            inline_size = os.path.getsize(path)
+            shared = best_of(lambda: write_html(figure(float32), path), 3)
+            print(f"{name}   inlined {inline_size / 1e3:8.1f} kB {inline * 1e3:7.1f} ms   "
+                  f"shared float32 {os.path.getsize(path) / 1e3:7.1f} kB {shared * 1e3:6.1f} ms")
+
+
+def bench_startup(args):
+    """Time to interactive: from launching Python to the main window shown, with the startup stages"""
+    import json
+    import subprocess
+    child = ("import time, json\n"
+             "from PySide6.QtCore import QCoreApplication, Qt\n"
+             "from PySide6.QtWidgets import QApplication\n"
+             "QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)\n"
+             "app = QApplication.instance() or QApplication([])\n"
+             "from main import startup\n"
+             "controller, timings = startup()\n"
+             "controller.ui.show()\n"
+             "app.processEvents()\n"
+             "print(json.dumps({'interactive': time.time(), 'timings': timings}))\n"
+             "controller.autosave.close()\n")
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    with tempfile.TemporaryDirectory() as tmp:
+        # empty user caches (matplotlib's font list included): the first run is a cold start
+        env["XDG_CACHE_HOME"] = tmp
+        env.pop("MPLCONFIGDIR", None)
+        for run in range(4):
+            start = time.time()
+            result = subprocess.run([sys.executable, "-c", child], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                    env=env, capture_output=True, text=True, timeout=300)
+            if result.returncode != 0:
+                print(result.stderr.strip().splitlines()[-1])
+                return
+            report = json.loads(result.stdout.strip().splitlines()[-1])
+            stages = "   ".join(f"{name} {seconds:5.2f} s" for name, seconds in report["timings"])
+            print(f"{'cold' if run == 0 else 'warm'}  interactive after {report['interactive'] - start:5.2f} s   {stages}")
+    print("(the fixed splash alone used to take 5 s plus a 0.7 s fade)")
+
+
+BENCHMARKS = {
+    "autosave": bench_autosave,
+    "batch": bench_batch,
+    "cache": bench_cache,
+    "directivity": bench_directivity,
+    "export": bench_export,
+    "history": bench_history,
+    "html": bench_html,
+    "metrics": bench_metrics,
+    "parser": bench_parser,
+    "project": bench_project,
+    "project_open": bench_project_open,
+    "scrub": bench_scrub,
+    "smoothing": bench_smoothing,
+    "startup": bench_startup,
+    "surface": bench_surface,
+    "surface_update": bench_surface_update,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the AntennaRay benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS) + ["all"], help="benchmark to run")
+    args = parser.parse_args(argv)
+    names = sorted(BENCHMARKS) if args.name == "all" else [args.name]
+    for name in names:
+        print(f"== {name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
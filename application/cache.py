@@ -0,0 +1,165 @@
+"""
+On-disk cache of parsed measurement files.
+
+Each entry is a raw .npy file holding the (cuts x angles) block plus a small
+JSON file with the header metadata, so re-opening a file is a memory-map
+instead of a parse.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def cache_dir(*parts, create=True):
+    """Return (and create unless told not to) a folder of the AntennaRay user cache"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "AntennaRay", *parts)
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_hash(file_path, chunk_size=1 << 20):
+    """blake2b digest of a file's content"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Parsed cuts keyed by file path, size, modification time and content hash.
+
+    Entries are looked up by (path, size, mtime) and checked against the hash of
+    the file content, so an edited file is parsed again even if its timestamp did
+    not change. Once the cache grows past `max_bytes` the least recently used
+    entries are evicted.
+    """
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        self.directory = directory or cache_dir("parsed")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()  # imports may run on worker threads
+
+    def entry_paths(self, file_path):
+        stat = os.stat(file_path)
+        key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, name + ".json"), os.path.join(self.directory, name + ".npy")
+
+    def get(self, file_path):
+        """Return (cuts, headers, points) for a file, or None if it is not cached.
+
+        `points` are the measured lengths of the cuts (None for older entries).
+        """
+        meta_path, data_path = self.entry_paths(file_path)
+        with self.lock:
+            try:
+                with open(meta_path, 'r') as file:
+                    meta = json.load(file)
+            except (OSError, ValueError):
+                return None
+            if meta.get("hash") != file_hash(file_path):
+                self.remove(meta_path, data_path)  # content changed under the same timestamp
+                return None
+            try:
+                cuts = np.asarray(np.load(data_path, mmap_mode='r'))
+            except (OSError, ValueError):
+                self.remove(meta_path, data_path)
+                return None
+            os.utime(meta_path)  # the metadata mtime is the LRU clock
+        return cuts, meta["headers"], meta.get("points")
+
+    def put(self, file_path, cuts, headers, points=None):
+        """Store the parsed cuts of a file, failures only cost a cache miss"""
+        if cuts is None:
+            return
+        meta_path, data_path = self.entry_paths(file_path)
+        meta = {"path": os.path.abspath(file_path), "hash": file_hash(file_path),
+                "headers": headers, "points": points}
+        with self.lock:
+            try:
+                # the metadata is written last, an entry without it is never read
+                np.save(data_path + ".tmp.npy", np.ascontiguousarray(cuts))
+                os.replace(data_path + ".tmp.npy", data_path)
+                with open(meta_path + ".tmp", 'w') as file:
+                    json.dump(meta, file)
+                os.replace(meta_path + ".tmp", meta_path)
+                self.evict()
+            except OSError as e:
+                print(f"Warning: Could not cache {file_path}: {e}")
+
+    def remove(self, meta_path, data_path):
+        for path in (meta_path, data_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def size(self):
+        """Total size of the cache on disk, in bytes"""
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file())
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            data_path = entry.path[:-len(".json")] + ".npy"
+            size = entry.stat().st_size + (os.path.getsize(data_path) if os.path.exists(data_path) else 0)
+            entries.append((entry.stat().st_mtime, entry.path, data_path, size))
+            total += size
+        for _, meta_path, data_path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.remove(meta_path, data_path)
+            total -= size
+
+    def clear(self):
+        with self.lock:
+            for entry in os.scandir(self.directory):
+                os.remove(entry.path)
+
+
+class LRUCache:
+    """Thread-safe in-memory cache keeping the `max_entries` most recently used values"""
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -1,35 +1,47 @@
-from logic import Model
+from logic import Model, smoothing_window
+from cache import ParseCache, cache_dir
+from history import History, Snapshot
+from html_export import float32
+from journal import Journal
+from project import read_project, write_project
 from UI_file import Window
-from PySide6.QtCore import QObject,QUrl
-from PySide6.QtWidgets import QMessageBox
+from workers import ImportTask, RecomputeScheduler, SmoothingPrewarmTask
+from PySide6.QtCore import QObject,QUrl,QThreadPool
+from PySide6.QtWidgets import QApplication, QMessageBox
+from functools import partial
 import json
 import numpy as np
 import os
 import plotly.graph_objects as go
-import plotly.io as pio
-import tempfile
-import webbrowser
 class Controler(QObject):
     def __init__(self  ,  parent = None):
         super().__init__(parent)
         self.model=Model(self)
+        try:
+            self.cache = ParseCache()  # parsed files, re-opened as memory-maps
+        except OSError as e:
+            print(f"Warning: files are parsed without a cache: {e}")
+            self.cache = None
+        self.import_task = None  # file being read in the background
+        self.prewarm_task = None  # smoothing cache being filled for the loaded file
+        # slider events are coalesced, only the newest smoothing is drawn
+        self.smooth_scheduler = RecomputeScheduler(
+            lambda request: request[0].smoothed_2D(request[1]),
+            self.render_smooth_2D, self.smooth_2D_failed, parent=self)
         self.ui = Window()  # Remove self as argument
         
-        self.listHistory = {
-                 "h_plane2D":[],
-                "e_plane2D":[],
-                "h_plane3D":[],
-                "e_plane3D":[],
-                "e_color":[],
-                "h_color" : [],
-                "show_lobes": [],  # Added for lobe highlighting
-                "smooth_2d": [],   # Added for 2D smoothing
-                "smooth_3d": [],   # Added for 3D smoothing
-                "display_mode": []
-                
-            }
-        self.index = -1
+        self.history = History()  # one Snapshot per state, for Back/Next
         self.i = -1
+        # every history change is journaled in the background, a crashed session can be recovered
+        self.autosave = Journal(cache_dir("autosave", create=False))  # the folder is made by start()
+        self.recover_autosave()
+        try:
+            self.autosave.start(self.history)
+        except OSError as e:
+            # a Journal that isn't started ignores every call
+            QMessageBox.warning(self.ui, "Autosave",
+                                f"Autosave is turned off, this session can't be recovered after a crash:\n{e}")
+        QApplication.instance().aboutToQuit.connect(self.autosave.close)
         # the signals and slots 
         
         self.ui.view.import_button.clicked.connect(self.read)
@@ -55,6 +67,7 @@ class Controler(QObject):
         self.ui.view.smoothness_slider1.valueChanged.connect(self.smooth_2D)
         self.ui.view.smooth_button.toggled.connect(self.smooth_3D)
         self.ui.view.online_view_button.clicked.connect(self.plotly_view_all)
+        self.ui.view.tab_widget.currentChanged.connect(self.refresh_online_view)
         self.ui.view.load_project.clicked.connect(self.load_project)
 
         #to show the highlight 
@@ -66,11 +79,10 @@ class Controler(QObject):
     def toggle_lobes_highlighting(self, checked):
         try:
             self.ui.fig2D.show_lobes = checked
-            self.listHistory["show_lobes"].append(checked)
-            self.limitListSize()
             if self.ui.fig2D.h_data is not None and self.ui.fig2D.e_data is not None:
                 self.ui.fig2D.plot_2D(self.ui.fig2D.h_data, self.ui.fig2D.e_data)
                 self.ui.toolbar1.push_current()
+                self.record("show_lobes", checked)
             else:
                 self.ui.view.statusbar.showMessage("No data to highlight. Please import data first.")
         except Exception as e:
@@ -78,128 +90,159 @@ class Controler(QObject):
             print(f"Error in toggle_lobes_highlighting: {e}")
 
     def read(self):
+        file_name = self.ui.open_file()
+        if not file_name:  # User cancelled file dialog
+            return
+
+        # only the last picked file is shown
+        if self.import_task is not None:
+            self.import_task.cancel()
+        # the smoothing the slider and the 3D button ask first, and the surface the 3D view shows
+        windows = (smoothing_window(self.ui.view.smoothness_slider1.value()), 11)
+        task = ImportTask(file_name, self.cache, windows, self.ui.fig3D.lod_resolution_for)
+        task.signals.progress.connect(partial(self.import_progress, task))
+        task.signals.finished.connect(partial(self.import_finished, task))
+        task.signals.failed.connect(partial(self.import_failed, task))
+        self.import_task = task
+        self.ui.view.progress_bar.setValue(0)
+        self.ui.view.progress_bar.show()
+        QThreadPool.globalInstance().start(task)
+
+    def import_progress(self, task, percent, message):
+        if task is not self.import_task:
+            return
+        self.ui.view.progress_bar.setValue(percent)
+        self.ui.view.statusbar.showMessage(message)
+
+    def import_finished(self, task, result):
+        if task is not self.import_task:
+            return
+        self.import_task = None
+        self.ui.view.progress_bar.hide()
+        self.smooth_scheduler.cancel()
         try:
-            file_name = self.ui.open_file()
-            if not file_name:  # User cancelled file dialog
-                return
-            
-            self.model.read_file(file_name)
-        
-        # Create history entry
-            if self.model.h_plane2D is not None:
-                Hdata2 = self.model.h_plane2D.copy()
-                color2h = self.ui.fig2D.color_h
-                Hdata3 = self.model.h_plane3D.copy()
-                self.listHistory["h_plane2D"].append(Hdata2)
-                self.listHistory["h_plane3D"].append(Hdata3)
-                self.listHistory["h_color"].append(color2h)
-            if self.model.e_plane2D is not None:
-                Edata2 = self.model.e_plane2D.copy()
-                Edata3 = self.model.e_plane3D.copy()
-                color2e = self.ui.fig2D.color_e
-                self.listHistory["e_plane2D"].append(Edata2)
-                self.listHistory["e_plane3D"].append(Edata3)
-                self.listHistory["e_color"].append(color2e)
-        
-        # Add default settings for new history keys
-            self.listHistory["show_lobes"].append(self.ui.fig2D.show_lobes)
-            self.listHistory["smooth_2d"].append(self.ui.view.smoothness_slider1.value())
-            self.listHistory["smooth_3d"].append(self.ui.view.smooth_button.isChecked())
-            self.listHistory["display_mode"].append(self.ui.fig2D.use_two_plots)
-        
-            self.index += 1
-            self.limitListSize()
-        
+            self.model = result
+            self.record("load")
+
         # Plot the data
             self.ui.fig2D.plot_2D(self.model.h_plane2D, self.model.e_plane2D)
             self.ui.toolbar1.push_current()
+            self.ui.view.statusbar.showMessage(f"Loaded {os.path.basename(task.file_path)}")
+            self.refresh_online_view()
+            self.prewarm_smoothing()
         
-        except FileNotFoundError:
-            QMessageBox.critical(self.ui, "File Error", "The selected file could not be found.")
-        except PermissionError:
-            QMessageBox.critical(self.ui, "Permission Error", "You don't have permission to read this file.")
         except Exception as e:
             QMessageBox.critical(self.ui, "Import Error", f"Failed to import file:\n{str(e)}")
 
-    def can_goBack(self):
-            if self.index > 0 :
-                  return True
-            else :
-                return False
+    def prewarm_smoothing(self):
+        """Smooth the new data for the whole slider range (and the 3D window) in the background"""
+        if self.prewarm_task is not None:
+            self.prewarm_task.cancel()
+        slider = self.ui.view.smoothness_slider1
+        self.prewarm_task = SmoothingPrewarmTask(self.model, range(slider.minimum(), slider.maximum() + 1), [11])
+        QThreadPool.globalInstance().start(self.prewarm_task)
+
+    def import_failed(self, task, error):
+        if task is not self.import_task:
+            return
+        self.import_task = None
+        self.ui.view.progress_bar.hide()
+        self.ui.view.statusbar.showMessage("Import failed")
+        if isinstance(error, FileNotFoundError):
+            QMessageBox.critical(self.ui, "File Error", "The selected file could not be found.")
+        elif isinstance(error, PermissionError):
+            QMessageBox.critical(self.ui, "Permission Error", "You don't have permission to read this file.")
+        else:
+            QMessageBox.critical(self.ui, "Import Error", f"Failed to import file:\n{str(error)}")
+
+    def view_settings(self):
+        """The view settings kept by each history state"""
+        return {
+            "h_color": self.ui.fig2D.color_h,
+            "e_color": self.ui.fig2D.color_e,
+            "show_lobes": self.ui.fig2D.show_lobes,
+            "smooth_2d": self.ui.view.smoothness_slider1.value(),
+            "smooth_3d": self.ui.view.smooth_button.isChecked(),
+            "display_mode": self.ui.fig2D.use_two_plots,
+            "normalized": self.ui.view.offset_button.isChecked(),
+        }
+
+    def record(self, operation, value=None):
+        """Log an operation that changed the state, see history.Operation"""
+        if self.model.cuts2D is None:
+            return
+        self.history.push((operation, value), Snapshot(self.model.cuts, self.model.dataset, self.model.cuts2D,
+                                                       self.model.cuts3D, **self.view_settings()))
+        self.autosave.pushed(self.history)
+
+    def recover_autosave(self):
+        """Offer to bring back the history of a session that didn't close normally"""
+        try:
+            history = self.autosave.recover(self.history.max_bytes, mapped=os.name != 'nt')
+        except Exception as e:
+            print(f"Warning: could not read the autosave: {e}")
+            return
+        if history is None or not len(history):
+            return
+        answer = QMessageBox.question(
+            self.ui, "Recover Session",
+            f"The previous session did not close normally.\nRecover its {len(history)} states?")
+        if answer == QMessageBox.StandardButton.Yes:
+            self.history = history
+            self.restore(self.history.current())
+            self.plot_3D()
+
+    def restore(self, state):
+        """Show a history state again"""
+        self.smooth_scheduler.cancel()  # a smoothing asked before would be drawn over the state
+        self.model.cuts, self.model.dataset = state.cuts, state.dataset
+        self.model.cuts2D = state.cuts2D
+        self.model.cuts3D = state.cuts3D
+
+        self.ui.fig2D.color_h = state.h_color
+        self.ui.fig2D.color_e = state.e_color
+        self.ui.fig2D.show_lobes = state.show_lobes
+        self.ui.fig2D.toggle_mode(state.display_mode)
+        # the controls follow the state without recording a new one
+        view = self.ui.view
+        for widget, value in ((view.highlight_lobes_button, state.show_lobes),
+                              (view.smooth_button, state.smooth_3d),
+                              (view.offset_button, state.normalized)):
+            widget.blockSignals(True)
+            widget.setChecked(value)
+            widget.blockSignals(False)
+        view.smoothness_slider1.blockSignals(True)
+        view.smoothness_slider1.setValue(state.smooth_2d)
+        view.smoothness_slider1.blockSignals(False)
+
+        self.ui.fig2D.plot_2D(self.model.h_plane2D, self.model.e_plane2D)
+        self.ui.toolbar1.push_current()  # Preserve 2D plot axes
+        if self.ui.fig3D.has_data:
+            self.plot_3D()
+        self.ui.view.statusbar.showMessage(
+            f"State {self.history.index + 1}/{len(self.history)} - history: {self.history.memory_report()}")
+        self.refresh_online_view()
 
-    def can_goForth(self):
-          return self.index < len(self.listHistory["h_plane2D"])-1
     def GoBack(self):
         try:
-            if not self.can_goBack():
+            if not self.history.can_go_back():
                 QMessageBox.warning(self.ui, "Navigation", "Already at the first state in history.")
                 return
-                
-            self.index -= 1
-            
-            # Validate history data exists
-            if (self.index >= len(self.listHistory["h_plane2D"]) or 
-                self.index >= len(self.listHistory["e_plane2D"])):
-                QMessageBox.critical(self.ui, "History Error", "History data is corrupted.")
-                self.index += 1  # Revert index
-                return
-                
-            self.model.h_plane2D = self.listHistory["h_plane2D"][self.index]
-            self.model.e_plane2D = self.listHistory["e_plane2D"][self.index]
-            self.model.h_plane3D = self.listHistory["h_plane3D"][self.index]
-            self.model.e_plane3D = self.listHistory["e_plane3D"][self.index]
-            self.ui.fig2D.color_h = self.listHistory["h_color"][self.index]
-            self.ui.fig2D.color_e = self.listHistory["e_color"][self.index]
-            
-            self.ui.fig2D.plot_2D(self.model.h_plane2D, self.model.e_plane2D)
-            self.ui.toolbar1.push_current()  # Preserve 2D plot axes
-            
-        except IndexError:
-            QMessageBox.critical(self.ui, "History Error", "Cannot navigate back - history index out of range.")
-            self.index = max(0, self.index)  # Reset to valid index
+            self.restore(self.history.back())
+            self.autosave.moved(self.history, -1)
         except Exception as e:
             QMessageBox.critical(self.ui, "Navigation Error", f"Failed to go back:\n{str(e)}")
 
     def GoForth(self):
         try:
-            if not self.can_goForth():
+            if not self.history.can_go_forth():
                 QMessageBox.warning(self.ui, "Navigation", "Already at the latest state in history.")
                 return
-                
-            self.index += 1
-            
-            # Validate history data exists
-            if (self.index >= len(self.listHistory["h_plane2D"]) or 
-                self.index >= len(self.listHistory["e_plane2D"])):
-                QMessageBox.critical(self.ui, "History Error", "History data is corrupted.")
-                self.index -= 1  # Revert index
-                return
-                
-            self.model.h_plane2D = self.listHistory["h_plane2D"][self.index]
-            self.model.e_plane2D = self.listHistory["e_plane2D"][self.index]
-            self.model.h_plane3D = self.listHistory["h_plane3D"][self.index]
-            self.model.e_plane3D = self.listHistory["e_plane3D"][self.index]
-            self.ui.fig2D.color_h = self.listHistory["h_color"][self.index]
-            self.ui.fig2D.color_e = self.listHistory["e_color"][self.index]
-            
-            self.ui.fig2D.plot_2D(self.model.h_plane2D, self.model.e_plane2D)
-            self.ui.toolbar1.push_current()  # Preserve 2D plot axes
-            
-        except IndexError:
-            QMessageBox.critical(self.ui, "History Error", "Cannot navigate forward - history index out of range.")
-            self.index = min(len(self.listHistory["h_plane2D"]) - 1, self.index)  # Reset to valid index
+            self.restore(self.history.forth())
+            self.autosave.moved(self.history, 1)
         except Exception as e:
             QMessageBox.critical(self.ui, "Navigation Error", f"Failed to go forward:\n{str(e)}")
-    def limitListSize(self):
-        i = len(self.listHistory["h_plane2D"]) - 1
-        if i>6 :
-            self.listHistory["h_plane2D"].pop(0) 
-            self.listHistory["e_plane2D"].pop(0) 
-            self.listHistory["h_plane3D"].pop(0) 
-            self.listHistory["e_plane3D"].pop(0) 
-            self.listHistory["h_color"].pop(0) 
-            self.listHistory["e_color"].pop(0) 
-           
+
     def normal(self):
         try:
             if self.ui.view.offset_button.isChecked():
@@ -213,6 +256,7 @@ class Controler(QObject):
             
             # Update both 2D 
             self.ui.fig2D.plot_2D(self.model.h_plane2D, self.model.e_plane2D)
+            self.record("normalized", self.ui.view.offset_button.isChecked())
             
             
            
@@ -228,8 +272,7 @@ class Controler(QObject):
             self.ui.fig2D.toggle_mode(True)
             self.ui.fig2D.plot_2D(self.model.h_plane2D, self.model.e_plane2D)
             self.ui.toolbar1.push_current()
-            self.listHistory["display_mode"].append(True)
-            self.limitListSize()
+            self.record("display_mode", True)
         except Exception as e:
             QMessageBox.critical(self.ui, "Plot Error", f"Failed to switch to split-plot mode:\n{str(e)}")
 
@@ -238,44 +281,58 @@ class Controler(QObject):
             self.ui.fig2D.toggle_mode(False)
             self.ui.fig2D.plot_2D(self.model.h_plane2D, self.model.e_plane2D)
             self.ui.toolbar1.push_current()
-            self.listHistory["display_mode"].append(False)
-            self.limitListSize()
+            self.record("display_mode", False)
         except Exception as e:
             QMessageBox.critical(self.ui, "Plot Error", f"Failed to switch to same-plot mode:\n{str(e)}")
 
     def polar_3D(self):
         try:
-            X, Y, Z = self.model.data_3D()
-            if X is None or Y is None or Z is None:
+            if self.model.cuts3D is None:
                 QMessageBox.warning(self.ui, "Data Warning", "3D data is not available. Please load a file first.")
                 return
                 
-            self.ui.fig3D.plot_surface(X, Y, Z)
+            self.plot_3D()
             self.ui.toolbar2.push_current()
         except AttributeError:
             QMessageBox.critical(self.ui, "Data Error", "Model data not available for 3D plotting. Please load a file first.")
         except Exception as e:
             QMessageBox.critical(self.ui, "3D Plot Error", f"Failed to create 3D plot:\n{str(e)}")
 
+    def plot_3D(self):
+        """Show the model's 3D surface, built at the level of detail Fig3D asks for"""
+        model = self.model
+        self.ui.fig3D.plot_source(lambda resolution: model.data_3D(resolution=resolution), model.cuts3D.shape[1])
+
     def smooth_2D(self, number):
+        if not hasattr(self.model, 'h_plane2D') or self.model.h_plane2D is None:
+            QMessageBox.warning(self.ui, "Data Warning", "No 2D data available for smoothing. Please load a file first.")
+            return
+        self.smooth_scheduler.submit((self.model, number))
+
+    def render_smooth_2D(self, request, block):
+        model, number = request
+        if model is not self.model:  # a new file was loaded meanwhile
+            return
         try:
-            if not hasattr(self.model, 'h_plane2D') or self.model.h_plane2D is None:
-                QMessageBox.warning(self.ui, "Data Warning", "No 2D data available for smoothing. Please load a file first.")
-                return
-            
-            self.model.smooth2D(number)
+            self.model.cuts2D = block
             self.ui.fig2D.plot_2D(self.model.h_plane2D, self.model.e_plane2D)
             self.ui.toolbar1.push_current()
         
         # Save smoothed state to history
-            self.listHistory["smooth_2d"].append(number)
-            self.limitListSize()
-        
-        except ValueError as e:
-            QMessageBox.critical(self.ui, "Smoothing Error", f"Invalid smoothing parameter:\n{str(e)}")
+            self.record("smooth_2d", number)
+
+            recomputes, redraws = self.smooth_scheduler.skipped()
+            self.ui.view.statusbar.showMessage(
+                f"Smoothing {number} - skipped {recomputes} recomputes and {redraws} redraws so far")
         except Exception as e:
             QMessageBox.critical(self.ui, "Processing Error", f"Failed to apply 2D smoothing:\n{str(e)}")
 
+    def smooth_2D_failed(self, error):
+        if isinstance(error, ValueError):
+            QMessageBox.critical(self.ui, "Smoothing Error", f"Invalid smoothing parameter:\n{str(error)}")
+        else:
+            QMessageBox.critical(self.ui, "Processing Error", f"Failed to apply 2D smoothing:\n{str(error)}")
+
     def smooth_3D(self, bool):
         try:
             if not hasattr(self.model, 'h_plane3D') or self.model.h_plane3D is None:
@@ -283,10 +340,8 @@ class Controler(QObject):
                 return
 
             self.model.smooth3D(bool)
-            self.listHistory["smooth_3d"].append(bool)
-            self.limitListSize()
-            X, Y, Z = self.model.data_3D()
-            self.ui.fig3D.plot_surface(X, Y, Z)
+            self.record("smooth_3d", bool)
+            self.plot_3D()
             self.ui.toolbar2.push_current()
         
         except Exception as e:
@@ -296,9 +351,12 @@ class Controler(QObject):
         
     def color_2D(self):
         try:
+            colors = (self.ui.fig2D.color_h, self.ui.fig2D.color_e)
             self.ui.pick_color_for()
             self.ui.fig2D.plot_2D(self.model.h_plane2D, self.model.e_plane2D)
             self.ui.toolbar1.push_current()
+            if (self.ui.fig2D.color_h, self.ui.fig2D.color_e) != colors:
+                self.record("color", (self.ui.fig2D.color_h, self.ui.fig2D.color_e))
         except Exception as e:
             QMessageBox.critical(self.ui, "Color Error", f"Failed to change plot colors:\n{str(e)}")
 
@@ -311,24 +369,11 @@ class Controler(QObject):
                 return
                 
             # Validate that we have data to save
-            if not self.listHistory["h_plane2D"]:
+            if not len(self.history):
                 QMessageBox.warning(self.ui, "Save Warning", "No data available to save. Please load a file first.")
                 return
                 
-            # Convert all numpy arrays to lists for JSON serialization
-            serializable_history = {}
-            for k, v in self.listHistory.items():
-                serializable_history[k] = []
-                for item in v:
-                    try:
-                        # Try to convert numpy array to list
-                        serializable_history[k].append(item.tolist())
-                    except (AttributeError, TypeError):
-                        # If it's not a numpy array, keep as is
-                        serializable_history[k].append(item)
-            
-            with open(file_path, 'w') as f:
-                json.dump(serializable_history, f, indent=2)
+            write_project(file_path, self.history)
                 
             QMessageBox.information(self.ui, "Success", f"Project saved successfully to:\n{file_path}")
             
@@ -336,8 +381,6 @@ class Controler(QObject):
             QMessageBox.critical(self.ui, "Permission Error", "You don't have permission to write to this location.")
         except OSError as e:
             QMessageBox.critical(self.ui, "File Error", f"Could not save file:\n{str(e)}")
-        except json.JSONEncodeError as e:
-            QMessageBox.critical(self.ui, "Data Error", f"Failed to serialize project data:\n{str(e)}")
         except Exception as e:
             QMessageBox.critical(self.ui, "Save Error", f"Failed to save project:\n{str(e)}")
 
@@ -351,39 +394,20 @@ class Controler(QObject):
                 QMessageBox.critical(self.ui, "File Error", f"File not found:\n{file_path}")
                 return
             
-            with open(file_path, 'r') as f:
-                loaded_history = json.load(f)
-        
-            required_keys = ["h_plane2D", "e_plane2D", "h_plane3D", "e_plane3D", "e_color", "h_color"]
-            if not all(key in loaded_history for key in required_keys):
-                QMessageBox.critical(self.ui, "Data Error", "Invalid project file format. Missing required data fields.")
+            try:
+                # a mapped file can't be replaced on Windows, so it is read into memory there
+                history = read_project(file_path, self.history.max_bytes, mapped=os.name != 'nt',
+                                       defaults=self.view_settings())
+            except (ValueError, TypeError) as e:
+                QMessageBox.critical(self.ui, "Data Error", f"Corrupted data in project file:\n{str(e)}")
                 return
-            
-            for k, v in loaded_history.items():
-                self.listHistory[k] = []
-                for item in v:
-                    try:
-                        if k.endswith('plane2D') or k.endswith('plane3D'):
-                            self.listHistory[k].append(np.array(item))
-                        else:
-                            self.listHistory[k].append(item)
-                    except (ValueError, TypeError) as e:
-                        QMessageBox.critical(self.ui, "Data Error", f"Corrupted data in project file for {k}:\n{str(e)}")
-                        return
-        
-            self.index = len(self.listHistory["h_plane2D"]) - 1
-        
-            if self.index >= 0:
-                self.model.h_plane2D = self.listHistory["h_plane2D"][self.index]
-                self.model.e_plane2D = self.listHistory["e_plane2D"][self.index]
-                self.model.h_plane3D = self.listHistory["h_plane3D"][self.index]
-                self.model.e_plane3D = self.listHistory["e_plane3D"][self.index]
-                self.ui.fig2D.color_h = self.listHistory["h_color"][self.index]
-                self.ui.fig2D.color_e = self.listHistory["e_color"][self.index]
-            
-                self.ui.fig2D.plot_2D(self.model.h_plane2D, self.model.e_plane2D)
-                X, Y, Z = self.model.data_3D()
-                self.ui.fig3D.plot_surface(X, Y, Z)
+            self.history = history
+            self.autosave.reset(self.history)
+
+            if len(self.history):
+                self.restore(self.history.current())
+                if not self.ui.fig3D.has_data:
+                    self.plot_3D()
             
             QMessageBox.information(self.ui, "Success", f"Project loaded successfully from:\n{file_path}")
         
@@ -403,56 +427,72 @@ class Controler(QObject):
 
 
     def plotly_view_all(self):
-        self.plotly_online_view()
-        self.plotly_3d_view()
-
-    def plotly_online_view(self):
-        
-
-        if self.model.h_plane2D is None or self.model.e_plane2D is None:
+        if self.model.h_plane2D is None:
             QMessageBox.warning(self.ui, "No Data",
                                 "Please load a file first.")
             return
+        if self.ui.view.tab_widget.currentWidget() is self.ui.view.tab3:
+            self.refresh_online_view()
+        else:
+            self.ui.view.tab_widget.setCurrentWidget(self.ui.view.tab3)  # currentChanged renders them
+
+    def refresh_online_view(self):
+        """Keep the interactive tab in step with the model while it is shown, never asks anything"""
+        if self.ui.view.tab_widget.currentWidget() is self.ui.view.tab3:
+            self.plotly_online_view(warn=False)
+            self.plotly_3d_view(warn=False)
+
+    def plotly_online_view(self, warn=True):
+        
+
+        if self.model.h_plane2D is None:
+            if warn:
+                QMessageBox.warning(self.ui, "No Data",
+                                    "Please load a file first.")
+            return
 
-        theta = np.linspace(0, 360, len(self.model.h_plane2D))
+        theta = float32(np.linspace(0, 360, len(self.model.h_plane2D)))
 
         fig = go.Figure()
     
         fig.add_trace(go.Scatterpolar(
-            r=self.model.h_plane2D,
+            r=float32(self.model.h_plane2D),
             theta=theta,
             mode='lines',
             name='H-plane',
             line=dict(color=self.ui.fig2D.color_h)
         ))
 
-        fig.add_trace(go.Scatterpolar(
-            r=self.model.e_plane2D,
-            theta=theta,
-            mode='lines',
-            name='E-plane',
-            line=dict(color=self.ui.fig2D.color_e)
-        ))
+        if self.model.e_plane2D is not None:  # files with a single cut only have the H-plane
+            fig.add_trace(go.Scatterpolar(
+                r=float32(self.model.e_plane2D),
+                theta=theta,
+                mode='lines',
+                name='E-plane',
+                line=dict(color=self.ui.fig2D.color_e)
+            ))
 
         fig.update_layout(
             title="Diagramme de rayonnement interactif (Plotly)",
             polar=dict(radialaxis=dict(visible=True)),
-            showlegend=True
+            showlegend=True,
+            uirevision="view"  # zoom and legend choices survive updates
         )
 
-        with tempfile.NamedTemporaryFile(suffix='.html', delete=False) as tmp_file:
-            pio.write_html(fig, file=tmp_file.name, auto_open=False)
-            tmp_file_path = tmp_file.name
-        webbrowser.open(f'file://{tmp_file_path}')
+        self.ui.online_view.show_figure("polar", fig.to_json())
 
-    def plotly_3d_view(self):
+    def plotly_3d_view(self, warn=True):
         
-        if self.model.h_plane3D is None or self.model.e_plane3D is None:
-            QMessageBox.warning(self.ui, "No Data",
-                                "Please load a file first.")
+        # a single cut is taken as rotationally symmetric by data_3D
+        if self.model.h_plane3D is None:
+            if warn:
+                QMessageBox.warning(self.ui, "No Data",
+                                    "Please load a file first.")
             return
 
-        X, Y, Z = self.model.data_3D()
+        # the interactive level of detail, the full grid of a fine measurement would be tens of MB
+        resolution = self.ui.fig3D.lod_resolution_for(self.model.cuts3D.shape[1])
+        X, Y, Z = self.model.data_3D(dtype=np.float32, resolution=resolution)
 
         fig = go.Figure(data=[go.Surface(
             z=Z, x=X, y=Y,
@@ -468,9 +508,8 @@ class Controler(QObject):
                 zaxis_title='Z'
             ),
             autosize=True,
-            margin=dict(l=20, r=20, t=50, b=20)
+            margin=dict(l=20, r=20, t=50, b=20),
+            uirevision="view"  # the camera stays where the user left it
         )
 
-        with tempfile.NamedTemporaryFile(suffix='.html', delete=False) as tmp_file:
-            pio.write_html(fig, file=tmp_file.name, auto_open=False)
-            webbrowser.open(f'file://{tmp_file.name}')
+        self.ui.online_view.show_figure("surface", fig.to_json())
@@ -0,0 +1,201 @@
+"""
+Offscreen export of report figures, no display needed.
+
+For each measurement file the 2D polar plot (H and E planes) and the 3D
+surface are rendered with Agg and saved as PNG, SVG or PDF. Each worker
+process creates the two figures once and only gives them the next file's
+data, like the interactive canvases do between smoothing steps. The images
+of measurements/sub/foo.atn are report/sub/foo.atn-2D.png and -3D.png, so
+files that only differ by extension or folder don't overwrite each other. E.g.:
+    python export.py measurements/ -o report/ -f png pdf --jobs 8
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from batch import find_files
+from logic import Model, surface_faces
+from metrics import pattern_metrics
+
+FORMATS = ("png", "svg", "pdf")
+
+
+def annotation_text(label, data, metrics, cut):
+    return (f"Max ({label}): {np.max(data):.2f} dB\n"
+            f"Min ({label}): {np.min(data):.2f} dB\n"
+            f"Δ ({label}): {(np.max(data) - np.min(data)):.2f} dB\n"
+            f"HPBW: {metrics.hpbw[cut]:.1f}°   F/B: {metrics.front_to_back[cut]:.1f} dB")
+
+
+class ReportFigures:
+    """The 2D and 3D figures of a report, built once and reused for every file.
+
+    `resolution` is the number of points per cut of the 3D surface, all files
+    share it so the surface always has the same faces and is updated in place.
+    """
+    def __init__(self, dpi=100, resolution=64, cmap='plasma'):
+        self.dpi = dpi
+        self.resolution = resolution
+
+        self.figure_2D = Figure(figsize=(12, 7), dpi=dpi)
+        FigureCanvasAgg(self.figure_2D)
+        self.axes = [self.figure_2D.add_subplot(121, polar=True), self.figure_2D.add_subplot(122, polar=True)]
+        self.lines = []
+        self.boxes = []
+        for ax, label, color, x in zip(self.axes, ('H-plane', 'E-plane'), ('blue', 'red'), (0.01, 0.5)):
+            self.lines.append(ax.plot([], [], color=color, label=label, linewidth=2)[0])
+            ax.set_title(label)
+            ax.legend()
+            ax.grid(True, color='#CCCCCC', alpha=0.3)
+            self.boxes.append(self.figure_2D.text(
+                x, 0.1, "", fontsize=12, va='center', ha='left', linespacing=1.8,
+                bbox=dict(facecolor='lightgray', alpha=0.5, edgecolor='black')))
+        self.axes[1].set_theta_zero_location("N")
+        self.axes[1].set_theta_direction(1)
+        self.title_2D = self.figure_2D.suptitle("")
+
+        self.figure_3D = Figure(figsize=(9, 8), dpi=dpi)
+        FigureCanvasAgg(self.figure_3D)
+        self.ax3 = self.figure_3D.add_subplot(111, projection='3d')
+        grid = np.zeros((resolution, resolution))
+        self.surface = self.ax3.plot_surface(grid, grid, grid, rcount=resolution, ccount=resolution,
+                                             cmap=cmap, edgecolor='none', alpha=0.8)
+        self.figure_3D.colorbar(self.surface, ax=self.ax3, shrink=0.5, label='Radiation Intensity (linear)')
+        self.ax3.set_xlabel('X')
+        self.ax3.set_ylabel('Y')
+        self.ax3.set_zlabel('Z')
+        self.ax3.view_init(elev=30, azim=45)
+        self.title_3D = self.ax3.set_title("")
+
+    def show_2D(self, model, name):
+        cuts = model.cuts2D
+        metrics = pattern_metrics(cuts[:2])
+        for cut, (ax, line, box, label) in enumerate(zip(self.axes, self.lines, self.boxes, ('H', 'E'))):
+            visible = cut < len(cuts)
+            ax.set_visible(visible)  # the whole axes, a single-cut file has no E-plane panel at all
+            box.set_visible(visible)
+            if not visible:
+                continue
+            data = cuts[cut]
+            line.set_data(np.linspace(0, 2 * np.pi, len(data), endpoint=False), data)
+            box.set_text(annotation_text(label, data, metrics, cut))
+            ax.relim()
+            ax.autoscale(axis='y')
+        self.title_2D.set_text(name)
+
+    def show_3D(self, model, name):
+        X, Y, Z = model.data_3D(resolution=self.resolution)
+        faces = surface_faces(X, Y, Z)
+        self.surface.set_verts(faces)
+        self.surface.set_array(faces[..., 2].mean(axis=-1))  # colored by mean height like plot_surface
+        self.surface.autoscale()
+        self.ax3.auto_scale_xyz(X, Y, Z, had_data=False)
+        self.title_3D.set_text(f"3D Antenna Radiation Pattern - {name}")
+
+    def export(self, path, folder, formats=("png",), smooth=0, normalize=False, name=None):
+        """Save the figures of one measurement file in `folder`, return the files written.
+
+        The files are named after `name`, by default the file name of `path`.
+        """
+        model = Model()
+        model.read_file(path)
+        if model.cuts is None:
+            raise ValueError("no data")
+        if smooth:
+            # the same window for both views, the 3D button's fixed one isn't used here
+            model.smooth2D(smooth)
+            model.cuts3D = model.smoothed_2D(smooth)
+        if normalize:
+            model.normalize("2D")
+            model.normalize("3D")
+        title = os.path.splitext(os.path.basename(path))[0]
+        self.show_2D(model, title)
+        self.show_3D(model, title)
+        output_name = os.path.join(folder, name or os.path.basename(path))
+        os.makedirs(os.path.dirname(output_name), exist_ok=True)
+        written = []
+        for figure, suffix in ((self.figure_2D, "2D"), (self.figure_3D, "3D")):
+            for file_format in formats:
+                output = f"{output_name}-{suffix}.{file_format}"
+                figure.savefig(output, format=file_format, dpi=self.dpi)
+                written.append(output)
+        return written
+
+
+figures = None  # ReportFigures of this worker process
+
+
+def init_worker(dpi, resolution):
+    global figures
+    figures = ReportFigures(dpi, resolution)
+
+
+def output_names(paths, root=None):
+    """Image names of the files, their paths relative to `root` (by default their common folder)"""
+    if root is None:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if paths else ""
+    return [os.path.relpath(os.path.abspath(path), root) for path in paths]
+
+
+def export_file(item, folder, formats, smooth, normalize):
+    """(path, files written, error) of one (path, name) item, run in a worker"""
+    path, name = item
+    try:
+        return path, figures.export(path, folder, formats, smooth, normalize, name), None
+    except Exception as e:
+        return path, [], str(e) or type(e).__name__
+
+
+def export_files(paths, folder, formats=("png",), smooth=0, normalize=False, dpi=100, resolution=64, jobs=None,
+                 root=None):
+    """Export the figures of every file, return (path, files written, error) in the order of `paths`.
+
+    The images are named after the paths relative to `root`, see output_names.
+    """
+    os.makedirs(folder, exist_ok=True)
+    items = list(zip(paths, output_names(paths, root)))
+    work = partial(export_file, folder=folder, formats=tuple(formats), smooth=smooth, normalize=normalize)
+    if jobs == 1:
+        init_worker(dpi, resolution)
+        return list(map(work, items))
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(jobs, initializer=init_worker, initargs=(dpi, resolution)) as executor:
+        return list(executor.map(work, items, chunksize=max(1, len(items) // (4 * jobs))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="folder of .atn/.txt measurement files")
+    parser.add_argument("-o", "--output", default="report", help="folder of the images")
+    parser.add_argument("-f", "--formats", nargs="+", choices=FORMATS, default=["png"])
+    parser.add_argument("-r", "--recursive", action="store_true", help="include the sub-folders")
+    parser.add_argument("--smooth", type=int, default=0,
+                        help="smoothing slider value, applied to the 2D cuts and the 3D surface alike, 0 for none")
+    parser.add_argument("--normalize", action="store_true", help="shift every cut so its maximum is 0 dB")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--resolution", type=int, default=64, help="points per cut of the 3D surface")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    paths = find_files(args.folder, args.recursive)
+    if not paths:
+        print(f"No measurement files in {args.folder}", file=sys.stderr)
+        return 1
+    results = export_files(paths, args.output, args.formats, args.smooth, args.normalize,
+                           args.dpi, args.resolution, args.jobs, root=args.folder)
+    failed = [(path, error) for path, _, error in results if error]
+    for path, error in failed:
+        print(f"Warning: skipped {path}: {error}", file=sys.stderr)
+    images = sum(len(written) for _, written, _ in results)
+    print(f"{len(paths) - len(failed)}/{len(paths)} files, {images} images -> {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
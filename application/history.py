@@ -0,0 +1,231 @@
+"""
+Undo/redo history of the displayed patterns.
+
+The history is a log with one operation per state (load, smooth, normalize,
+color...). At every load, and every few operations after it, a checkpoint
+keeps the whole state as an immutable Snapshot; any other state is rebuilt
+by replaying the operations that follow the checkpoint before it. Snapshot
+arrays are the model's own blocks, made read-only and shared instead of
+copied: the model never changes a block in place, it always builds a new one.
+"""
+import sys
+from collections import namedtuple
+from functools import partial
+
+import numpy as np
+
+from cache import LRUCache
+from logic import Model, dataset_ids
+
+# keys of the JSON project files of older versions, one list per key
+LEGACY_KEYS = ("h_plane2D", "e_plane2D", "h_plane3D", "e_plane3D", "h_color", "e_color",
+               "show_lobes", "smooth_2d", "smooth_3d", "display_mode")
+SETTINGS = ("h_color", "e_color", "show_lobes", "smooth_2d", "smooth_3d", "display_mode", "normalized")
+
+
+def frozen(block):
+    """`block` itself, made read-only so it can be shared"""
+    if block is not None and block.flags.writeable:
+        block.flags.writeable = False
+    return block
+
+
+class Snapshot(namedtuple("Snapshot", ("cuts", "dataset", "cuts2D", "cuts3D") + SETTINGS)):
+    """One state of the application: the model's blocks and the view settings.
+
+    `dataset` is the model's smoothing cache id.
+    """
+    __slots__ = ()
+
+    def __new__(cls, cuts, dataset, cuts2D, cuts3D, **settings):
+        return super().__new__(cls, frozen(cuts), dataset, frozen(cuts2D), frozen(cuts3D), **settings)
+
+    def arrays(self):
+        return [block for block in (self.cuts, self.cuts2D, self.cuts3D) if block is not None]
+
+
+class Operation(namedtuple("Operation", ["name", "value"])):
+    """What led to a state: "load" (never replayed), "smooth_2d", "smooth_3d", "normalized",
+    "color" (an (h, e) pair), "display_mode" or "show_lobes", with the new value"""
+    __slots__ = ()
+
+
+def replay(state, operations):
+    """The state reached by applying `operations` to `state`, as the controller does"""
+    if not operations:
+        return state
+    model = Model()
+    model.cuts, model.dataset, model.cuts2D, model.cuts3D = state.cuts, state.dataset, state.cuts2D, state.cuts3D
+    settings = state._asdict()
+    for name, value in operations:
+        if name == "load":
+            raise ValueError("A load can't be replayed, it is always a checkpoint")
+        if name == "color":
+            settings["h_color"], settings["e_color"] = value
+            continue
+        if name == "smooth_2d":
+            model.smooth2D(value)
+        elif name == "smooth_3d":
+            model.smooth3D(value)
+        elif name == "normalized":
+            for mode in ("2D", "3D"):
+                if value:
+                    model.normalize(mode)
+                else:
+                    model.denormalize(mode)
+        settings[name] = value
+    settings.update(cuts2D=model.cuts2D, cuts3D=model.cuts3D)
+    return Snapshot(**settings)
+
+
+class History:
+    """Operation log with a current position and checkpoints.
+
+    A checkpoint is kept at every load and `checkpoint_every` operations after
+    the previous one. Past `max_bytes` of checkpoint arrays (shared arrays
+    counted once) the checkpoints between loads are dropped first, then the
+    oldest files with all their states.
+
+    Checkpoints read from a project file can be left in `unloaded` as functions
+    returning the Snapshot, they are only called when a state needs them.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, checkpoint_every=16):
+        self.max_bytes = max_bytes
+        self.checkpoint_every = checkpoint_every
+        self.operations = []
+        self.checkpoints = {}  # state index -> Snapshot
+        self.unloaded = {}  # state index -> function returning the Snapshot
+        self.states = LRUCache(max_entries=8)  # recently rebuilt states, by index
+        self.index = -1
+
+    def __len__(self):
+        return len(self.operations)
+
+    def copy(self):
+        """A History with the same states, unaffected by later changes to this one"""
+        history = History(self.max_bytes, self.checkpoint_every)
+        history.operations = list(self.operations)
+        history.checkpoints = dict(self.checkpoints)
+        history.unloaded = dict(self.unloaded)
+        history.index = self.index
+        return history
+
+    def state(self, index):
+        """The Snapshot of state `index`, rebuilt from the checkpoint before it"""
+        if index in self.checkpoints or index in self.unloaded:
+            return self.checkpoint(index)
+        state = self.states.get(index)
+        if state is None:
+            base = max(i for i in self.checkpoint_indices() if i <= index)
+            state = replay(self.checkpoint(base), self.operations[base + 1:index + 1])
+            self.states.put(index, state)
+        return state
+
+    def checkpoint(self, index):
+        """The checkpoint of state `index`, loaded if it wasn't yet"""
+        if index in self.unloaded:
+            self.checkpoints[index] = self.unloaded.pop(index)()
+        return self.checkpoints[index]
+
+    def checkpoint_indices(self):
+        return sorted(self.checkpoints.keys() | self.unloaded.keys())
+
+    def current(self):
+        return self.state(self.index) if self.operations else None
+
+    def push(self, operation, snapshot):
+        """Add a state after the current one, the states that were undone are dropped.
+
+        `snapshot` is the state the operation led to, kept if it is a checkpoint.
+        """
+        del self.operations[self.index + 1:]
+        for index in self.checkpoint_indices():
+            if index > self.index:
+                self.checkpoints.pop(index, None)
+                self.unloaded.pop(index, None)
+        self.states.clear()
+        self.operations.append(Operation(*operation))
+        self.index = len(self.operations) - 1
+        last = max(self.checkpoint_indices(), default=None)
+        if operation[0] == "load" or last is None or self.index - last >= self.checkpoint_every:
+            self.checkpoints[self.index] = snapshot
+        else:
+            self.states.put(self.index, snapshot)
+        self.evict()
+
+    def can_go_back(self):
+        return self.index > 0
+
+    def can_go_forth(self):
+        return self.index < len(self.operations) - 1
+
+    def back(self):
+        self.index -= 1
+        return self.state(self.index)
+
+    def forth(self):
+        self.index += 1
+        return self.state(self.index)
+
+    def unique_arrays(self):
+        arrays = {id(block): block for state in self.checkpoints.values() for block in state.arrays()}
+        return list(arrays.values())
+
+    def nbytes(self):
+        """Memory held by the checkpoints' arrays, shared arrays counted once"""
+        return sum(block.nbytes for block in self.unique_arrays())
+
+    def evict(self):
+        """Drop checkpoints until the history fits in max_bytes, the current file is always kept"""
+        while self.nbytes() > self.max_bytes:
+            # loads (and the first state) can't be rebuilt from anything else
+            indices = self.checkpoint_indices()
+            loads = [index for index in indices if index == indices[0] or self.operations[index].name == "load"]
+            others = [index for index in sorted(self.checkpoints) if index not in loads]
+            if others:
+                del self.checkpoints[others[0]]
+            elif len(loads) > 1 and loads[1] <= self.index:
+                self.drop_before(loads[1])
+            else:
+                break
+
+    def drop_before(self, start):
+        """Forget the states before `start`"""
+        del self.operations[:start]
+        self.checkpoints = {index - start: state for index, state in self.checkpoints.items() if index >= start}
+        self.unloaded = {index - start: load for index, load in self.unloaded.items() if index >= start}
+        self.index -= start
+        self.states.clear()
+
+    def memory_report(self):
+        operations_bytes = sum(map(sys.getsizeof, self.operations))
+        return (f"{len(self.operations)} states, {len(self.checkpoints)} checkpoints "
+                f"({len(self.unloaded)} more not loaded), "
+                f"{len(self.unique_arrays())} arrays, {(self.nbytes() + operations_bytes) / 2**20:.2f} MiB, "
+                f"budget {self.max_bytes / 2**20:.0f} MiB")
+
+    @classmethod
+    def from_lists(cls, lists, defaults, max_bytes=64 * 1024 * 1024):
+        """Rebuild a history from the legacy project layout, every state is a checkpoint.
+
+        The arrays of a state are only built when it is shown. Older files did
+        not keep the settings lists in step with the planes, a list that doesn't
+        have one value per state is replaced by `defaults`.
+        """
+        history = cls(max_bytes)
+        count = len(lists["h_plane2D"])
+
+        def load(i):
+            blocks = {}
+            for key in ("2D", "3D"):
+                planes = [lists[plane + key][i] for plane in ("h_plane", "e_plane")
+                          if i < len(lists.get(plane + key, []))]
+                blocks[key] = np.array(planes, dtype=float)
+            settings = {key: lists[key][i] if len(lists.get(key, [])) == count else defaults[key]
+                        for key in SETTINGS}
+            return Snapshot(blocks["2D"], next(dataset_ids), blocks["2D"], blocks["3D"], **settings)
+
+        history.operations = [Operation("load", None)] * count
+        history.unloaded = {i: partial(load, i) for i in range(count)}
+        history.index = count - 1
+        return history
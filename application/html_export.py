@@ -0,0 +1,74 @@
+"""
+HTML pages of plotly figures sharing one local copy of plotly.js.
+
+pio.write_html inlines the whole plotly.js bundle (several MB) in every file.
+Here the bundle is written once to the user cache and every page loads it
+with a <script src>, including the page of the in-app interactive view.
+Give the traces float32 NumPy arrays: plotly (6 and later) stores NumPy
+arrays as base64 typed arrays, so a 2D figure is a few kilobytes of JSON.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from cache import cache_dir
+
+
+def plotly_js():
+    """Path of the cached plotly.js of the installed plotly, written on first use"""
+    path = os.path.join(cache_dir("plotly"), f"plotly-{get_plotlyjs_version()}.min.js")
+    if not os.path.exists(path):
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(get_plotlyjs())
+        os.replace(temporary, path)
+    return path
+
+
+def float32(values):
+    """`values` as a float32 array, the compact typed array plotly embeds"""
+    return np.asarray(values, dtype=np.float32)
+
+
+def write_html(fig, path):
+    """Write `fig` as a page loading the cached plotly.js, return its path"""
+    pio.write_html(fig, file=path, include_plotlyjs=Path(plotly_js()).as_uri(), auto_open=False)
+    return path
+
+
+INTERACTIVE_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="{plotly}"></script>
+<style>
+html, body {{ margin: 0; height: 100%; }}
+#charts {{ display: flex; height: 100%; }}
+.chart {{ flex: 1; min-width: 0; }}
+</style>
+</head>
+<body>
+<div id="charts"><div id="polar" class="chart"></div><div id="surface" class="chart"></div></div>
+<script>
+// called by the application with the JSON of a figure, only what changed is redrawn
+function showFigure(id, figure) {{
+    Plotly.react(id, figure.data, figure.layout, {{responsive: true}});
+}}
+</script>
+</body>
+</html>
+"""
+
+
+def interactive_page():
+    """Path of the page of the interactive view (a 2D and a 3D chart), written on first use"""
+    path = os.path.join(cache_dir("views"), f"interactive-{get_plotlyjs_version()}.html")
+    if not os.path.exists(path):
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(INTERACTIVE_PAGE.format(plotly=Path(plotly_js()).as_uri()))
+        os.replace(temporary, path)
+    return path
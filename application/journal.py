@@ -0,0 +1,331 @@
+"""
+Autosave of the history: a project file plus an append-only journal.
+
+Every change of the history (a new state, a step back or forth) is queued by
+the GUI thread and appended to the journal by a background thread; records
+that were waiting together are written with a single fsync. Every
+`compact_every` records the whole history is saved again as a project and a
+new, empty journal is started. The files of a generation are
+autosave-N.arproj and autosave-N.journal, and a generation is only removed
+once the next one is on disk, so a crash at any point leaves a complete
+project and the journal that follows it.
+
+Each session writes in its own session-<id> folder, held by a session-<id>.lock
+lock file. A folder whose lock is stale (its process is gone) was left by a
+crash: it is offered for recovery and removed once the new session is on disk.
+Running sessions never touch each other's folders.
+
+A record is a (header length, payload length, crc32) prefix, a JSON header and
+the .npy arrays of a new checkpoint. A record torn by a crash is ignored.
+"""
+import io
+import json
+import os
+import queue
+import re
+import shutil
+import struct
+import threading
+import uuid
+import zlib
+
+import numpy as np
+from PySide6.QtCore import QLockFile
+
+from history import Operation, Snapshot, SETTINGS, replay
+from logic import dataset_ids
+from project import read_project, write_project
+
+RECORD = struct.Struct("<3L")
+FILE_NAME = re.compile(r"autosave-(\d+)\.arproj$")
+SESSION_NAME = re.compile(r"session-[0-9a-f]+$")
+
+
+def encode(header, arrays=()):
+    """One journal record"""
+    payload = io.BytesIO()
+    for array in arrays:
+        np.lib.format.write_array(payload, array, allow_pickle=False)
+    header = json.dumps(header).encode()
+    payload = payload.getvalue()
+    return RECORD.pack(len(header), len(payload), zlib.crc32(payload, zlib.crc32(header))) + header + payload
+
+
+def records(path):
+    """The (header, arrays) of the complete records of a journal file"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    offset = 0
+    while offset + RECORD.size <= len(data):
+        header_length, payload_length, crc = RECORD.unpack_from(data, offset)
+        start = offset + RECORD.size
+        end = start + header_length + payload_length
+        if end > len(data) or zlib.crc32(data[start:end]) != crc:
+            break  # the write was cut by a crash
+        header = json.loads(data[start:start + header_length])
+        payload = io.BytesIO(data[start + header_length:end])
+        yield header, [np.lib.format.read_array(payload) for _ in header.get("new", ())]
+        offset = end
+
+
+def apply(history, journal):
+    """Replay the records of a journal on the History it follows"""
+    arrays = {}  # name -> array written by an earlier record
+    datasets = {}  # saved dataset id -> id in this session's smoothing cache
+    for header, new in journal:
+        arrays.update(zip(header.get("new", ()), new))
+        if "move" in header:
+            history.index = min(max(history.index + header["move"], 0), len(history) - 1)
+            continue
+        name, value = header["push"]
+        operation = Operation(name, tuple(value) if name == "color" else value)
+        if "arrays" in header:
+            blocks = {key: arrays[array] for key, array in header["arrays"].items()}
+            saved = header["dataset"]
+            if saved not in datasets or saved is None:
+                datasets[saved] = next(dataset_ids)
+            state = Snapshot(blocks.get("cuts"), datasets[saved], blocks.get("cuts2D"), blocks.get("cuts3D"),
+                             **header["settings"])
+        else:
+            state = replay(history.current(), [operation])
+        history.push(operation, state)
+
+
+def session_lock(folder):
+    """Lock file of a session folder, only stale once its process is gone, however old"""
+    lock = QLockFile(folder + ".lock")
+    lock.setStaleLockTime(0)
+    return lock
+
+
+def generations(folder):
+    """Autosave generations of a session folder, oldest first"""
+    if not os.path.isdir(folder):
+        return []
+    matches = (FILE_NAME.match(name) for name in os.listdir(folder))
+    return sorted(int(match.group(1)) for match in matches if match)
+
+
+def sync_directory(path):
+    """Make the renames and new files of a folder durable (no-op where folders can't be opened)"""
+    if os.name == 'nt':
+        return
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class Journal:
+    """Autosave of a History in `directory`, written by a background thread.
+
+    The GUI thread only queues what changed: pushed() after History.push,
+    moved() after a step back or forth and reset() when the history is
+    replaced. close() removes the autosave when the session ends normally,
+    recover() reads back the one a crashed session left.
+    """
+    def __init__(self, directory, compact_every=64):
+        self.directory = directory  # one folder per session
+        self.session = os.path.join(directory, f"session-{uuid.uuid4().hex}")
+        self.lock = None
+        self.crashed = None  # [(folder, lock)] of the crashed sessions this one took over
+        self.compact_every = compact_every
+        self.records = 0  # records queued since the last compaction
+        self.queue = queue.Queue()
+        self.thread = None
+        self.error = None
+        # used by the writer thread only
+        self.generation = 0
+        self.file = None
+        self.written = {}  # id -> (name, array) of the arrays already in the journal
+
+    def path(self, generation, suffix, session=None):
+        return os.path.join(session or self.session, f"autosave-{generation}.{suffix}")
+
+    def take_over_crashed(self):
+        """Lock the folders of the sessions that didn't close, most recent first"""
+        if self.crashed is not None:
+            return self.crashed
+        self.crashed = []
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                folder = os.path.join(self.directory, name)
+                if not SESSION_NAME.match(name) or folder == self.session or not os.path.isdir(folder):
+                    continue
+                lock = session_lock(folder)
+                if lock.tryLock(0):  # its owner is gone (a running session keeps it locked)
+                    self.crashed.append((folder, lock))
+        self.crashed.sort(key=lambda crashed: os.path.getmtime(crashed[0]), reverse=True)
+        return self.crashed
+
+    def recover(self, max_bytes=64 * 1024 * 1024, mapped=True):
+        """The History autosaved by a session that didn't close, None if there is none"""
+        for folder, _ in self.take_over_crashed():
+            found = generations(folder)
+            if not found:
+                continue
+            generation = found[-1]
+            history = read_project(self.path(generation, "arproj", folder), max_bytes, mapped)
+            if not mapped:
+                # the files are read again on demand and the next compaction removes them
+                for index in history.checkpoint_indices():
+                    history.checkpoint(index)
+            journal = self.path(generation, "journal", folder)
+            if os.path.exists(journal):
+                apply(history, records(journal))
+            return history
+        return None
+
+    def start(self, history):
+        """Autosave `history` from now on, the crashed sessions are removed once it is on disk"""
+        os.makedirs(self.directory, exist_ok=True)
+        lock = session_lock(self.session)
+        if not lock.tryLock(0):
+            raise OSError(f"could not lock {lock.fileName()}: error {lock.error()}")
+        try:
+            os.makedirs(self.session, exist_ok=True)
+            self.take_over_crashed()
+        except OSError:
+            lock.unlock()
+            raise
+        self.lock = lock
+        self.generation = 0
+        self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.thread.start()
+        self.reset(history)
+
+    def reset(self, history):
+        """Save the whole history again, e.g. after a project was opened"""
+        if self.thread is None:
+            return
+        self.records = 0
+        self.queue.put(("compact", history.copy()))
+
+    def pushed(self, history):
+        """Log the state History.push just added"""
+        if self.thread is None:
+            return
+        index = history.index
+        self.queue.put(("push", history.operations[index], history.checkpoints.get(index)))
+        self.count(history)
+
+    def moved(self, history, steps):
+        """Log a step back (-1) or forth (+1) in the history"""
+        if self.thread is None:
+            return
+        self.queue.put(("move", steps))
+        self.count(history)
+
+    def count(self, history):
+        self.records += 1
+        if self.records >= self.compact_every:
+            self.reset(history)
+
+    def flush(self):
+        """Wait until everything queued so far is on disk"""
+        if self.thread is not None:
+            done = threading.Event()
+            self.queue.put(("flush", done))
+            done.wait()
+
+    def close(self):
+        """Stop the writer and remove the autosave, the session ended normally"""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+        if self.error is None:
+            shutil.rmtree(self.session, ignore_errors=True)
+        # with an error the folder stays, and is recovered once the lock is released
+        self.lock.unlock()
+
+    def remove(self, generation):
+        for suffix in ("arproj", "journal"):
+            try:
+                os.remove(self.path(generation, suffix))
+            except FileNotFoundError:
+                pass
+
+    def remove_crashed(self):
+        """Remove the folders of the crashed sessions, this one holds the history now"""
+        for folder, lock in self.crashed or ():
+            shutil.rmtree(folder, ignore_errors=True)
+            lock.unlock()
+        self.crashed = []
+
+    def run(self):
+        """Writer thread: write what is queued, one fsync for all the records waiting together"""
+        stop = False
+        events = []
+        while not stop:
+            batch = [self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                for item in batch:
+                    if item is None:
+                        stop = True
+                    elif item[0] == "compact":
+                        self.compact(item[1])
+                    elif item[0] == "flush":
+                        events.append(item[1])
+                    else:
+                        self.file.write(self.encode(item))
+                if self.file is not None:
+                    self.file.flush()
+                    os.fsync(self.file.fileno())
+            except Exception as e:
+                print(f"Warning: autosave stopped: {e}")
+                self.error = e
+                stop = True
+            for event in events:
+                event.set()
+            events.clear()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.error is not None:
+            # nothing is queued past this point, don't leave the GUI thread waiting
+            while not self.queue.empty():
+                item = self.queue.get_nowait()
+                if item is not None and item[0] == "flush":
+                    item[1].set()
+
+    def encode(self, item):
+        if item[0] == "move":
+            return encode({"move": item[1]})
+        _, operation, state = item
+        header = {"push": list(operation)}
+        new = []
+        if state is not None:  # a checkpoint, its arrays are written once per journal
+            names = {}
+            for key in ("cuts", "cuts2D", "cuts3D"):
+                block = getattr(state, key)
+                if block is None:
+                    continue
+                if id(block) not in self.written:
+                    self.written[id(block)] = (str(len(self.written)), block)
+                    new.append(self.written[id(block)])
+                names[key] = self.written[id(block)][0]
+            header.update(arrays=names, dataset=state.dataset,
+                          settings={key: getattr(state, key) for key in SETTINGS},
+                          new=[name for name, _ in new])
+        return encode(header, [block for _, block in new])
+
+    def compact(self, history):
+        """Start the next generation with the whole history, then remove the older ones"""
+        generation = self.generation + 1
+        write_project(self.path(generation, "arproj"), history)
+        journal = open(self.path(generation, "journal"), 'wb')
+        sync_directory(self.session)
+        if self.file is not None:
+            self.file.close()
+        self.file = journal
+        self.written = {}
+        self.generation = generation
+        for old in generations(self.session):
+            if old < generation:
+                self.remove(old)
+        self.remove_crashed()
@@ -1,140 +1,347 @@
-from PySide6.QtCore import QObject
 import numpy as np 
-from scipy.signal import savgol_filter
+import itertools
+from functools import lru_cache
+
+from cache import LRUCache
+from metrics import cut_directivity
+from smoothing import circular_savgol, resample_cuts
+
+# Byte classes used to spot the few lines that may not hold a single plain number
+OTHER, DIGIT, DOT, SIGN, BLANK, NEWLINE = range(6)
+BYTE_CLASS = np.full(256, OTHER, dtype=np.uint8)
+BYTE_CLASS[ord('0'):ord('9') + 1] = DIGIT
+BYTE_CLASS[ord('.')] = DOT
+BYTE_CLASS[[ord('-'), ord('+')]] = SIGN
+BYTE_CLASS[[ord(' '), ord('\t')]] = BLANK
+BYTE_CLASS[ord('\n')] = NEWLINE
+
+
+def is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def parse_lines(data):
+    """Line by line reader, used when a file has lines the fast path can't convert"""
+    blocks = []
+    headers = []
+    header = []
+    values = []
+    for line in data.splitlines():
+        if is_number(line):
+            values.append(float(line))
+        elif line.strip():
+            # metadata closes the current block
+            if values:
+                blocks.append(np.array(values))
+                headers.append(header)
+                header = []
+            values = []
+            header.append(line.decode(errors='replace').strip())
+    if values:
+        blocks.append(np.array(values))
+        headers.append(header)
+    return blocks, headers
+
+
+def parse_file(file_path):
+    """Return the numeric blocks of a measurement file and their headers.
+
+    Metadata lines (header, date, time...) separate the blocks. They are found
+    with a few vectorized passes over the raw bytes: only lines holding a
+    letter, an inner blank or a misplaced sign are checked one by one, then
+    every block between two metadata lines is converted in one NumPy call.
+    headers[i] holds the metadata lines read just before blocks[i].
+    """
+    with open(file_path, 'rb') as file:
+        data = file.read()
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+    kind = BYTE_CLASS[np.frombuffer(data, dtype=np.uint8)]
+    previous = np.empty_like(kind)
+    previous[:1] = NEWLINE
+    previous[1:] = kind[:-1]
+    suspect = (kind == OTHER) \
+        | ((kind == SIGN) & (previous >= DIGIT) & (previous <= SIGN)) \
+        | ((kind == BLANK) & (previous < BLANK))
+    newlines = np.flatnonzero(kind == NEWLINE)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.append(newlines, len(data))
+
+    regions = []
+    metadata = []
+    start = 0
+    for line in np.unique(np.searchsorted(newlines, np.flatnonzero(suspect))):
+        text = data[starts[line]:ends[line]]
+        if not is_number(text):
+            regions.append(data[start:starts[line]])
+            metadata.append(text.decode(errors='replace').strip())
+            start = ends[line]
+    regions.append(data[start:])
+
+    blocks = []
+    headers = []
+    header = []
+    try:
+        for i, region in enumerate(regions):
+            values = region.split()  # blank lines inside a block are skipped
+            if values:
+                blocks.append(np.array(values, dtype=float))
+                headers.append(header)
+                header = []
+            if i < len(metadata):
+                header.append(metadata[i])
+    except ValueError:
+        # malformed line such as "1.2.3", let the slow reader sort it out
+        return parse_lines(data)
+    return blocks, headers
+
+
+def replace_cut(block, row, values):
+    """Return a copy of `block` with cut `row` set to `values` (None drops it and the cuts after it)"""
+    if values is None:
+        return block[:row] if block is not None and row > 0 else None
+    values = np.asarray(values, dtype=float)
+    if block is None or block.shape[1] != len(values):
+        block = np.empty((0, len(values)))
+    if row >= len(block):
+        block = np.vstack([block] + [values] * (row + 1 - len(block)))
+    else:
+        block = block.copy()
+    block[row] = values
+    return block
+
+
+def common_length(blocks):
+    """The cuts brought to the length of the longest one, each taken as a closed pattern over 360 deg"""
+    size = max(len(block) for block in blocks)
+    angles = np.arange(size) / size
+    return [block if len(block) == size
+            else np.interp(angles, np.arange(len(block)) / len(block), block, period=1.0)
+            for block in blocks]
+
+
+# Smoothed blocks shared by every Model, keyed by (dataset, window, polyorder)
+smoothing_cache = LRUCache(max_entries=32)
+dataset_ids = itertools.count()
+
+
+def smoothing_window(number):
+    """Savitzky-Golay window for a slider value (windows must be odd), 1 means no smoothing"""
+    return number + 1 if number % 2 == 0 else number
+
+
+@lru_cache(maxsize=8)
+def sphere_tables(size, dtype):
+    """sin/cos of the phi (column vectors) and theta (row vectors) grids of data_3D"""
+    theta = np.linspace(0, 2 * np.pi, size)
+    phi = np.linspace(0, np.pi, size)
+    tables = (np.sin(phi)[:, np.newaxis], np.cos(phi)[:, np.newaxis],
+              np.cos(theta)[np.newaxis, :], np.sin(theta)[np.newaxis, :])
+    tables = tuple(table.astype(dtype) for table in tables)
+    for table in tables:
+        table.flags.writeable = False
+    return tables
+
+
+def surface_faces(X, Y, Z):
+    """(faces, 4, 3) corners of every grid cell, in the order matplotlib's plot_surface gives them"""
+    corners = [(slice(None, -1), slice(None, -1)), (slice(None, -1), slice(1, None)),
+               (slice(1, None), slice(1, None)), (slice(1, None), slice(None, -1))]
+    faces = np.stack([np.stack([a[rows, columns] for rows, columns in corners], axis=-1)
+                      for a in (X, Y, Z)], axis=-1)
+    return faces.reshape(-1, 4, 3)
+
+
+def cut_property(block_name, row):
+    """Expose one row of a cuts block as a plane attribute, e.g. h_plane2D is cuts2D[0]"""
+    def getter(self):
+        block = getattr(self, block_name)
+        if block is None or row >= len(block):
+            return None
+        return block[row]
+
+    def setter(self, values):
+        setattr(self, block_name, replace_cut(getattr(self, block_name), row, values))
+
+    return property(getter, setter)
+
 
 class Model():
+    """Radiation pattern made of any number of cuts.
+
+    Every cut is a row of a contiguous (cuts x angles) array: `cuts` holds the
+    raw measurement, `cuts2D` and `cuts3D` the smoothed/normalized versions
+    shown by each view. The first two cuts are the H-plane and the E-plane.
+    """
     def __init__(self, parent =None):
         
-        self.h_plane2D = None
-        self.e_plane2D = None
-        self.h_plane3D = None
-        self.e_plane3D = None
-        self.h_plane = None
-        self.e_plane = None
+        self.cuts = None
+        self.cuts2D = None
+        self.cuts3D = None
+        self.cut_info = []
+        self.dataset = None
+        self.surface = None  # (cuts3D, {(dtype, resolution): (X, Y, Z)}) of data_3D
         self.maxH = None
         self.maxE = None
         self.pas5 = None
-        
-    def read_file(self,file_path):
-        
-        self.h_plane = []
-        self.e_plane = []
-
-        reading_started = False  # We haven't started reading numbers yet
-        reading_h_plane = True   # When we start, we assume it's H-plane
-
-        with open(file_path, 'r') as file:
-            for line in file:
-                line = line.strip()  # Clean whitespace
-                
-                if not line:
-                    continue  # Skip empty lines
-
-                try:
-                    value = float(line)
-                    reading_started = True  # First number seen → real data starts now
-
-                    if reading_h_plane:
-                        self.h_plane.append(value)
-                    else:
-                        self.e_plane.append(value)
-
-                except ValueError:
-                    # Failed to parse float → it's metadata
-                    if reading_started:
-                        # If reading already started and now metadata → switch to E-plane
-                        reading_h_plane = False
-                    # Else: still skipping initial metadata
-                    continue
-        # Convert to numpy arrays, set to None if empty
-        self.h_plane = np.array(self.h_plane) if len(self.h_plane) > 0 else None
-        self.e_plane = np.array(self.e_plane) if len(self.e_plane) > 0 else None
-        self.h_plane2D = self.h_plane
-        self.e_plane2D = self.e_plane
-        self.h_plane3D = self.h_plane
-        self.e_plane3D = self.e_plane
-        if self.h_plane is not None and len(self.h_plane) < 360:
-            self.pas5 = True
+
+    # the H/E planes are the first two cuts of each block
+    h_plane = cut_property('cuts', 0)
+    e_plane = cut_property('cuts', 1)
+    h_plane2D = cut_property('cuts2D', 0)
+    e_plane2D = cut_property('cuts2D', 1)
+    h_plane3D = cut_property('cuts3D', 0)
+    e_plane3D = cut_property('cuts3D', 1)
+
+    def read_file(self,file_path, cache=None, progress=None):
+        """Read a measurement file, going through `cache` (a ParseCache) when given.
+
+        `progress(percent, message)` is called after each stage, percent being
+        the share of the read done (a cache hit skips to 100).
+        """
+        progress = progress or (lambda percent, message: None)
+        cached = cache.get(file_path) if cache is not None else None
+        if cached is not None:
+            self.set_cuts(*cached)
+            progress(100, "Loaded from the cache")
+            return
+        progress(10, "Parsing...")
+        blocks, headers = parse_file(file_path)
+        progress(60, f"Building the block of {len(blocks)} cuts...")
+        self.set_cuts(blocks, headers)
+        if cache is not None:
+            progress(80, "Caching the parsed cuts...")
+            cache.put(file_path, self.cuts, headers, [info["points"] for info in self.cut_info])
+        progress(100, "Parsed")
+
+    def set_cuts(self, blocks, headers=None, points=None):
+        """Load the cuts, either a list of arrays or a (cuts x angles) array, and their metadata lines.
+
+        `points` are the lengths of the cuts as measured, when `blocks` was already resampled.
+        """
+        if headers is None:
+            headers = [[] for _ in blocks]
+        if isinstance(blocks, np.ndarray):
+            cuts = blocks  # already one block, e.g. memory-mapped from the cache
+        else:
+            # cuts of different lengths (e.g. 360 and 359 points) are resampled to the longest
+            cuts = np.vstack(common_length(blocks)) if len(blocks) > 0 else None
+
+        self.cuts = cuts
+        self.dataset = next(dataset_ids)  # identifies these cuts in the smoothing cache
+        if points is None:
+            points = [len(block) for block in blocks]
+        self.cut_info = [{"header": header, "points": count} for count, header in zip(points, headers)]
         # set each data to the figure type 
-    def normalize(self, mode):
-        if mode == "2D" :
-            if self.h_plane2D is not None:
+        self.cuts2D = self.cuts
+        self.cuts3D = self.cuts
+        self.pas5 = self.cuts is not None and self.cuts.shape[1] < 360
 
-                self.h_plane2D = self.h_plane2D - np.max(self.h_plane2D)
-            if self.e_plane2D is not None:
-                self.e_plane2D = self.e_plane2D - np.max(self.e_plane2D)
-            
-        elif mode == "3D" :
-            if self.h_plane3D is not None:
+    @staticmethod
+    def peak_normalized(block):
+        """Shift every cut so that its maximum is 0 dB"""
+        return block - block.max(axis=1, keepdims=True)
+
+    def normalize(self, mode):
+        if mode == "2D" and self.cuts2D is not None:
+            self.cuts2D = self.peak_normalized(self.cuts2D)
+        elif mode == "3D" and self.cuts3D is not None:
+            self.cuts3D = self.peak_normalized(self.cuts3D)
 
-                self.h_plane3D = self.h_plane3D - np.max(self.h_plane3D)
-            if self.e_plane3D is not None:
-                self.e_plane3D = self.e_plane3D - np.max(self.e_plane3D)
     def denormalize(self,mode):
-        self.maxH = np.max(self.h_plane)
-        self.maxE = np.max(self.e_plane)
-        if mode == "2D" and self.h_plane2D is not None and self.e_plane2D is not None:
-            self.h_plane2D = self.h_plane2D + self.maxH
-            self.e_plane2D = self.e_plane2D + self.maxE
+        if self.cuts is None:
+            return
+        peaks = self.cuts.max(axis=1, keepdims=True)
+        self.maxH = peaks[0, 0]
+        self.maxE = peaks[1, 0] if len(peaks) > 1 else None
+        if mode == "2D" and self.cuts2D is not None:
+            self.cuts2D = self.cuts2D + peaks
+
+        elif mode == "3D" and self.cuts3D is not None:
+            self.cuts3D = self.cuts3D + peaks
+
 
-        elif mode == "3D" and self.h_plane3D is not None and self.e_plane3D is not None:
-            self.h_plane3D = self.h_plane3D + self.maxH
-            self.e_plane3D = self.e_plane3D + self.maxE
+    def smoothed(self, window, polyorder=2):
+        """Raw cuts smoothed with a circular Savitzky-Golay window, cached per dataset.
 
+        The returned block is read-only since it is shared through the cache.
+        """
+        key = (self.dataset, window, polyorder)
+        block = smoothing_cache.get(key)
+        if block is None:
+            block = circular_savgol(self.cuts, window, polyorder)
+            block.flags.writeable = False
+            smoothing_cache.put(key, block)
+        return block
+
+    def smoothed_2D(self, number):
+        """The block smooth2D would show for a slider value, without changing the model"""
+        number = smoothing_window(number)
+        if number == 1:
+            return self.cuts
+        # Always smooth from original clean data and normalize after smoothing
+        return self.peak_normalized(self.smoothed(number))
 
     def smooth2D(self, number):
-        if self.e_plane is not None and self.h_plane is not None:
-            if number % 2 == 0:
-                number += 1
-            if number == 0 or number ==1:
-                self.h_plane2D =self.h_plane
-                self.e_plane2D =self.e_plane
-                
-                return
-            # Always smooth from original clean data
-            
-            
-            smoothed_h = savgol_filter(self.h_plane, window_length=number, polyorder=2)
-            smoothed_e = savgol_filter(self.e_plane, window_length=number, polyorder=2)
-        
-            self.h_plane2D = smoothed_h
-            self.e_plane2D = smoothed_e
-        if self.h_plane is not None:
-            if number % 2 == 0:
-                number += 1
-            if number == 0 or number ==1:
-                self.h_plane2D =self.h_plane
-                
-                return 
-            smoothed_h = savgol_filter(self.h_plane, window_length=number, polyorder=2)
-        # always normlize after smmohting
-        self.normalize("2D")
+        if self.cuts is None:
+            return
+        self.cuts2D = self.smoothed_2D(number)
             
     def smooth3D(self,bool):
-        if self.e_plane is not None and self.h_plane is not None and bool:            
-            self.h_plane3D= savgol_filter(self.h_plane, window_length=11, polyorder=2)
-            self.e_plane3D= savgol_filter(self.e_plane, window_length=11, polyorder=2)
+        if self.cuts is not None and bool:
+            self.cuts3D = self.smoothed(11)
             self.normalize("3D")
-        elif self.e_plane is not None and self.h_plane is not None and not bool : 
-            self.h_plane3D = self.h_plane
-            self.e_plane3D = self.e_plane
+        elif self.cuts is not None and not bool :
+            self.cuts3D = self.cuts
         else :
             return
 
-    def data_3D(self):
-        size = len(self.h_plane3D)
-        theta = np.linspace(0, 2 * np.pi,size)
-        phi = np.linspace(0, np.pi,size )
-        theta, phi = np.meshgrid(theta, phi)
-        
-        
-        # Fake 3D radial values by averaging E & H
-        r = (np.outer(self.h_plane3D, np.ones_like(self.e_plane3D)) + np.outer(np.ones_like(self.h_plane3D),self.e_plane3D )) / 2
+    def directivity(self):
+        """Directivity in dBi of the 3D pattern (the H and E planes of cuts3D), None without data"""
+        if self.cuts3D is None:
+            return None
+        e_plane = self.cuts3D[1] if len(self.cuts3D) > 1 else None
+        return float(cut_directivity(self.cuts3D[0], e_plane)[0])
+
+    def data_3D(self, dtype=np.float64, resolution=None):
+        """X, Y, Z of the 3D surface, memoized until cuts3D changes.
+
+        `resolution` resamples the cuts to that many points first (level of
+        detail for interactive views). The result is shared and read-only; pass
+        dtype=np.float32 to halve its size.
+        """
+        dtype = np.dtype(dtype)
+        if self.surface is None or self.surface[0] is not self.cuts3D:
+            self.surface = (self.cuts3D, {})
+        surfaces = self.surface[1]
+        if (dtype, resolution) in surfaces:
+            return surfaces[dtype, resolution]
 
-        # Convert spherical to cartesian
-        X = r * np.sin(phi) * np.cos(theta)
-        Y = r * np.sin(phi) * np.sin(theta)
-        Z = r * np.cos(phi)
-        return X,Y,Z
+        planes = self.cuts3D[:2]  # H and E
+        if resolution is not None:
+            planes = resample_cuts(planes, resolution)
+        h_plane = planes[0].astype(dtype, copy=False)
+        # a single cut is taken as rotationally symmetric
+        e_plane = planes[1].astype(dtype, copy=False) if len(planes) > 1 else h_plane
+        sin_phi, cos_phi, cos_theta, sin_theta = sphere_tables(len(h_plane), dtype)
 
+        # Fake 3D radial values by averaging E & H (rows follow phi, columns theta)
+        r = h_plane[:, np.newaxis] + e_plane[np.newaxis, :]
+        r *= 0.5
 
+        # Convert spherical to cartesian, reusing the temporaries in place
+        rho = r * sin_phi
+        X = rho * cos_theta
+        Y = rho
+        Y *= sin_theta
+        Z = r
+        Z *= cos_phi
+        for array in (X, Y, Z):
+            array.flags.writeable = False
+        surfaces[dtype, resolution] = (X, Y, Z)
+        return surfaces[dtype, resolution]
@@ -1,19 +1,55 @@
 import sys
+import time
+from PySide6.QtCore import QCoreApplication, Qt
 from PySide6.QtWidgets import QApplication
-from controller import Controler
 from welcomepage import SplashScreen
 
-def main():
-    app = QApplication(sys.argv)
-    controller = None
 
-    def show_main():
-        nonlocal controller
-        controller = Controler()
-        controller.ui.show()
+def startup(splash=None):
+    """Build the application stage by stage, the splash progress follows the stages.
+
+    Returns the Controler and the (stage, seconds) timings.
+    """
+    loaded = {}
+
+    def import_modules():
+        import controller  # numpy, scipy, matplotlib, plotly and the Qt widgets
+        loaded["module"] = controller
+
+    def build_window():
+        loaded["controller"] = loaded["module"].Controler()  # Window, Fig2D and Fig3D
 
-    splash = SplashScreen(on_finish=show_main)
+    def warm_up_fonts():
+        # the first draw loads the fonts and fills matplotlib's glyph caches
+        ui = loaded["controller"].ui
+        ui.fig2D.draw()
+        ui.fig3D.draw()
+
+    # (message, stage, progress once it is done), the progress roughly follows the time spent
+    stages = [("Loading libraries...", import_modules, 75),
+              ("Building the main window...", build_window, 85),
+              ("Warming up the font cache...", warm_up_fonts, 100)]
+    timings = []
+    for message, stage, progress in stages:
+        if splash is not None:
+            splash.set_progress(splash.progress_bar.value(), message)
+        start = time.perf_counter()
+        stage()
+        timings.append((message.rstrip("."), time.perf_counter() - start))
+        if splash is not None:
+            splash.set_progress(progress)
+    return loaded["controller"], timings
+
+
+def main():
+    # needed by Qt WebEngine before the application exists, its module is only imported by startup()
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv)
+    splash = SplashScreen()
     splash.show()
+    controller, _ = startup(splash)
+    controller.ui.show()
+    splash.finish()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
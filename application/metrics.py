@@ -0,0 +1,180 @@
+"""
+Radiation pattern metrics, computed for every cut of a (cuts x angles) block at once.
+
+Each cut is taken as a closed pattern in dB sampled evenly over 360 deg. The
+cuts are rotated so that their peak sits in the same column, then every metric
+is a NumPy reduction over the whole block: no per-cut Python loop. Metrics that
+a cut doesn't have (no -3 dB point, no null) are NaN.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import find_peaks
+
+HALF_POWER = 10 * np.log10(0.5)  # -3.01 dB
+CHUNK = 512  # cuts processed together, bounds the temporaries of large blocks
+
+
+class Metrics(namedtuple("Metrics", ["boresight", "peak", "hpbw", "fnbw", "sll", "front_to_back", "null_depth"])):
+    """One array per metric with a value per cut, angles in degrees and levels in dB.
+
+    boresight: angle of the peak; peak: its level; hpbw/fnbw: half-power and
+    first-null beamwidths of the main lobe; sll: highest level outside the main
+    lobe relative to the peak (negative); front_to_back: peak over the level
+    180 deg away; null_depth: deepest level relative to the peak (negative).
+    """
+    __slots__ = ()
+
+
+class Lobes(namedtuple("Lobes", ["main", "secondary", "back"])):
+    """Sample indices of the main lobe, the highest other lobe (None if there is
+    none) and the direction opposite the main lobe"""
+    __slots__ = ()
+
+
+def side_edges(side):
+    """Distance in samples to the -3 dB point (fractional) and to the first null (-1 if none).
+
+    Each row of `side` walks away from the peak, in dB below it, starting with the peak.
+    """
+    rows = np.arange(len(side))
+    below = side < HALF_POWER
+    found = below.any(axis=1)
+    first = np.maximum(below.argmax(axis=1), 1)
+    inside, outside = side[rows, first - 1], side[rows, first]
+    with np.errstate(divide='ignore', invalid='ignore'):  # rows without a -3 dB point
+        half_power = np.where(found, first - 1 + (inside - HALF_POWER) / (inside - outside), np.nan)
+    # the first null is the first sample past the -3 dB point that the next one rises from
+    rising = side[:, 1:] > side[:, :-1]
+    rising &= np.arange(side.shape[1] - 1) >= first[:, np.newaxis]
+    null_found = found & rising.any(axis=1)
+    return half_power, np.where(null_found, rising.argmax(axis=1), -1)
+
+
+def chunk_metrics(block, step):
+    cuts, size = block.shape
+    rows = np.arange(cuts)
+    peak_index = block.argmax(axis=1)
+    peak = block[rows, peak_index]
+    half = size // 2
+    # every cut rotated so that its peak is column `half`, in dB below the peak
+    offsets = np.arange(-half, size - half)
+    rolled = np.take_along_axis(block, (peak_index[:, np.newaxis] + offsets) % size, axis=1)
+    rolled -= peak[:, np.newaxis]
+
+    half_after, null_after = side_edges(rolled[:, half:])
+    half_before, null_before = side_edges(rolled[:, half::-1])
+    has_nulls = (null_after >= 0) & (null_before >= 0)
+    columns = np.arange(size)
+    main_lobe = (columns >= half - null_before[:, np.newaxis]) & (columns <= half + null_after[:, np.newaxis])
+    side_lobes = np.where(main_lobe, -np.inf, rolled).max(axis=1)
+
+    return Metrics(
+        boresight=peak_index * step,
+        peak=peak,
+        hpbw=(half_after + half_before) * step,
+        fnbw=np.where(has_nulls, (null_after + null_before) * step, np.nan),
+        sll=np.where(has_nulls & np.isfinite(side_lobes), side_lobes, np.nan),
+        front_to_back=-rolled[:, 0],  # column 0 is half a turn from the peak
+        null_depth=rolled.min(axis=1),
+    )
+
+
+def pattern_metrics(block, step=None):
+    """Metrics of every cut of `block` (a single cut is accepted too).
+
+    `step` is the angle between two samples in degrees, by default the cuts
+    cover 360 deg.
+    """
+    block = np.atleast_2d(np.asarray(block, dtype=float))
+    step = 360 / block.shape[1] if step is None else step
+    chunks = [chunk_metrics(block[start:start + CHUNK], step) for start in range(0, len(block) or 1, CHUNK)]
+    return Metrics(*(np.concatenate(values) for values in zip(*chunks)))
+
+
+def lobe_analysis(cut):
+    """Lobes of a single cut, None if it has no peak"""
+    cut = np.asarray(cut, dtype=float)
+    if not np.all(np.isfinite(cut)):
+        return None
+    size = len(cut)
+    distance = max(1, size // 36)
+    # the cut is closed: padded with the samples from its other end, a lobe across 0 deg is found too
+    pad = min(distance, size)
+    peaks, _ = find_peaks(np.concatenate((cut[-pad:], cut, cut[:pad])), distance=distance)
+    peaks = peaks[(peaks >= pad) & (peaks < size + pad)] - pad
+    if len(peaks) == 0:
+        return None
+    order = np.argsort(cut[peaks])[::-1]
+    main = int(peaks[order[0]])
+    secondary = int(peaks[order[1]]) if len(peaks) > 1 else None
+    return Lobes(main, secondary, (main + size // 2) % size)
+
+
+@lru_cache(maxsize=16)
+def sphere_weights(polar, azimuth):
+    """Quadrature weights of a (polar x azimuth) grid covering the sphere.
+
+    The polar angles are linspace(0, pi, polar) and the azimuths
+    linspace(0, 2 pi, azimuth), the grid of Model.data_3D. The weights are the
+    trapezoidal rule times sin(theta), so that sum(outer(w_polar, w_azimuth) * P)
+    is the integral of P over the sphere.
+    """
+    weights = []
+    for size, span in ((polar, np.pi), (azimuth, 2 * np.pi)):
+        step = span / (size - 1)
+        weight = np.full(size, step)
+        weight[[0, -1]] = step / 2
+        weights.append(weight)
+    weights[0] *= np.sin(np.linspace(0, np.pi, polar))
+    for weight in weights:
+        weight.flags.writeable = False
+    return tuple(weights)
+
+
+def to_dBi(directivity):
+    return 10 * np.log10(directivity)
+
+
+def cut_directivity(h_planes, e_planes=None):
+    """Directivity in dBi of patterns built from H and E cuts like Model.data_3D does.
+
+    The pattern in dB at polar sample i and azimuth sample j is the mean of
+    h[i] and e[j], so its power is separable and the integral over the sphere
+    is a product of two weighted sums. Takes single cuts or (patterns x angles)
+    blocks, a missing E cut is taken as rotationally symmetric.
+    """
+    h_planes = np.atleast_2d(np.asarray(h_planes, dtype=float))
+    e_planes = h_planes if e_planes is None else np.atleast_2d(np.asarray(e_planes, dtype=float))
+    w_polar, w_azimuth = sphere_weights(h_planes.shape[1], e_planes.shape[1])
+    results = []
+    for start in range(0, len(h_planes) or 1, CHUNK):
+        integral = 1.0
+        for planes, weights in ((h_planes[start:start + CHUNK], w_polar), (e_planes[start:start + CHUNK], w_azimuth)):
+            # amplitudes relative to the peak, the peak power of the pattern is then 1
+            amplitude = planes - planes.max(axis=1, keepdims=True)
+            amplitude *= np.log(10) / 20
+            integral = integral * (np.exp(amplitude) @ weights)
+        results.append(4 * np.pi / integral)
+    return to_dBi(np.concatenate(results))
+
+
+def grid_directivity(patterns):
+    """Directivity in dBi of full spherical patterns in dB, (polar x azimuth) or a batch of them.
+
+    The grid is the one of sphere_weights.
+    """
+    patterns = np.asarray(patterns, dtype=float)
+    single = patterns.ndim == 2
+    patterns = patterns.reshape((-1,) + patterns.shape[-2:])
+    w_polar, w_azimuth = sphere_weights(*patterns.shape[1:])
+    results = []
+    for start in range(0, len(patterns) or 1, CHUNK):
+        chunk = patterns[start:start + CHUNK]
+        power = chunk - chunk.max(axis=(1, 2), keepdims=True)
+        power *= np.log(10) / 10
+        np.exp(power, out=power)
+        results.append(4 * np.pi / ((power @ w_azimuth) @ w_polar))
+    directivity = to_dBi(np.concatenate(results))
+    return directivity[0] if single else directivity
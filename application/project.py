@@ -0,0 +1,151 @@
+"""
+Project files: the undo/redo history saved as a binary container.
+
+A project is an uncompressed zip (readable by np.load like an .npz) holding
+`manifest.json` with the operation log, the checkpoint settings and the
+array names, plus one raw .npy member per array. Arrays shared by several
+checkpoints are stored once. Reading memory-maps the file and returns
+read-only arrays that point straight into it, nothing is parsed or copied.
+Projects written as indented JSON by older versions can still be read.
+"""
+import io
+import json
+import mmap
+import os
+import struct
+import zipfile
+from functools import partial
+
+import numpy as np
+
+from history import History, Operation, Snapshot, SETTINGS
+from logic import dataset_ids
+
+FORMAT = "antennaray-project"
+VERSION = 1
+ALIGNMENT = 64  # array data starts on a 64 byte boundary in the file
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")  # zip local file header, up to the file name
+PADDING_ID = 0xD935  # zip extra field id used for alignment padding
+# settings of states saved without them, e.g. the normalization in legacy projects
+DEFAULT_SETTINGS = {"h_color": "blue", "e_color": "red", "show_lobes": False, "smooth_2d": 0,
+                    "smooth_3d": False, "display_mode": True, "normalized": False}
+
+
+def write_member(archive, name, array):
+    """Store `array` as a raw .npy member whose data is aligned in the file"""
+    array = np.ascontiguousarray(array)
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, np.lib.format.header_data_from_array_1_0(array))
+    header = header.getvalue()  # padded to a multiple of 64 bytes by numpy
+    info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_STORED
+    info.file_size = len(header) + array.nbytes
+    start = archive.fp.tell() + LOCAL_HEADER.size + len(name.encode()) + 4
+    padding = -start % ALIGNMENT
+    info.extra = struct.pack("<HH", PADDING_ID, padding) + b"\0" * padding
+    with archive.open(info, "w") as member:
+        member.write(header)
+        member.write(array.data.cast("B") if array.nbytes else b"")
+
+
+def write_project(path, history):
+    """Save a History, through a temporary file so a failed save keeps the previous project"""
+    arrays = {}  # id -> (name, array), shared arrays are written once
+    checkpoints = []
+    for index in history.checkpoint_indices():
+        state = history.checkpoint(index)  # the file being replaced may hold the unloaded ones
+        names = {}
+        for key in ("cuts", "cuts2D", "cuts3D"):
+            block = getattr(state, key)
+            if block is not None:
+                if id(block) not in arrays:
+                    arrays[id(block)] = (f"arrays/{len(arrays)}.npy", block)
+                names[key] = arrays[id(block)][0]
+        checkpoints.append({"index": index, "dataset": state.dataset, "arrays": names,
+                            "settings": {key: getattr(state, key) for key in SETTINGS}})
+    manifest = {
+        "format": FORMAT,
+        "version": VERSION,
+        "index": history.index,
+        "checkpoint_every": history.checkpoint_every,
+        "operations": [list(operation) for operation in history.operations],
+        "checkpoints": checkpoints,
+    }
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        with zipfile.ZipFile(file, "w", zipfile.ZIP_STORED) as archive:
+            for name, block in arrays.values():
+                write_member(archive, name, block)
+            archive.writestr("manifest.json", json.dumps(manifest))
+        file.flush()
+        os.fsync(file.fileno())  # on disk before it replaces the previous file
+    os.replace(temporary, path)
+
+
+def member_array(buffer, info):
+    """Read-only array viewing a stored .npy member of the mapped archive"""
+    name_length, extra_length = LOCAL_HEADER.unpack_from(buffer, info.header_offset)[-2:]
+    start = info.header_offset + LOCAL_HEADER.size + name_length + extra_length
+    header = io.BytesIO(buffer[start:start + min(info.file_size, 1 << 16)])
+    version = np.lib.format.read_magic(header)
+    read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+    shape, fortran_order, dtype = read_header(header)
+    count = int(np.prod(shape))
+    array = np.frombuffer(buffer, dtype=dtype, count=count, offset=start + header.tell())
+    return array.reshape(shape, order='F' if fortran_order else 'C')
+
+
+def read_project(path, max_bytes=64 * 1024 * 1024, mapped=True, defaults=None):
+    """Open a project file as a History, binary or legacy JSON.
+
+    Only the manifest is read here: the checkpoints are left unloaded and
+    their arrays are read when a state needs them, so opening a project takes
+    the same time whatever its size. With `mapped` the arrays are views of a
+    memory-map of the file, keep it False where an open mapping would stop the
+    file from being replaced (Windows), the arrays are then read into memory.
+    `defaults` fills the settings a file doesn't have.
+    """
+    defaults = dict(DEFAULT_SETTINGS, **(defaults or {}))
+    if not zipfile.is_zipfile(path):
+        with open(path, 'r') as file:
+            return History.from_lists(json.load(file), defaults, max_bytes)
+
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+        infos = {info.filename: info for info in archive.infolist()}
+    if manifest.get("format") != FORMAT:
+        raise ValueError("Not an AntennaRay project file.")
+    if manifest.get("version", 0) > VERSION:
+        raise ValueError(f"Project written by a newer version (format {manifest['version']}).")
+
+    if mapped and all(info.compress_type == zipfile.ZIP_STORED for info in infos.values()):
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        read_array = partial(member_array, buffer)
+    else:
+        def read_array(info):
+            with zipfile.ZipFile(path) as archive:
+                return np.load(io.BytesIO(archive.read(info)))
+
+    arrays = {}  # name -> array, shared by the checkpoints that use it
+
+    def load(checkpoint, dataset):
+        blocks = {}
+        for key, name in checkpoint["arrays"].items():
+            if name not in arrays:
+                arrays[name] = read_array(infos[name])
+            blocks[key] = arrays[name]
+        settings = dict(defaults, **checkpoint["settings"])
+        return Snapshot(blocks.get("cuts"), dataset, blocks.get("cuts2D"), blocks.get("cuts3D"), **settings)
+
+    history = History(max_bytes, manifest.get("checkpoint_every", 16))
+    history.operations = [Operation(name, tuple(value) if name == "color" else value)
+                          for name, value in manifest["operations"]]
+    datasets = {}  # saved dataset id -> id in this session's smoothing cache
+    for checkpoint in manifest["checkpoints"]:
+        saved = checkpoint["dataset"]
+        if saved not in datasets or saved is None:
+            datasets[saved] = next(dataset_ids)
+        history.unloaded[checkpoint["index"]] = partial(load, checkpoint, datasets[saved])
+    history.index = manifest["index"]
+    return history
@@ -0,0 +1,85 @@
+"""
+Images shipped with the application, and optional remote assets.
+
+Bundled files are found next to this module whatever the working directory
+and are loaded once. Remote assets are optional (the application always starts
+with the bundled images) and never fetched on the GUI thread: a task reads them
+from the user cache or downloads them with a timeout, and hands them over
+through a signal. The tasks run on a one-thread pool of their own, so a slow
+network never holds the threads of the imports and smoothing.
+"""
+import hashlib
+import os
+from functools import lru_cache
+from urllib.request import urlopen
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QIcon, QPixmap
+
+RESOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def resource_path(*parts):
+    return os.path.join(RESOURCE_DIR, *parts)
+
+
+@lru_cache(maxsize=None)
+def icon(name):
+    """QIcon of the bundled icons/<name>.svg"""
+    return QIcon(resource_path("icons", f"{name}.svg"))
+
+
+@lru_cache(maxsize=None)
+def pixmap(file_name):
+    """QPixmap of a bundled image"""
+    return QPixmap(resource_path(file_name))
+
+
+class AssetSignals(QObject):
+    loaded = Signal(bytes)
+
+
+class RemoteAssetTask(QRunnable):
+    """Get the bytes of a remote asset, from the user cache or downloaded with a timeout"""
+    def __init__(self, url, timeout=3.0):
+        super().__init__()
+        self.url = url
+        self.timeout = timeout
+        self.signals = AssetSignals()
+
+    def run(self):
+        from cache import cache_dir  # here rather than at import: NumPy isn't needed before the splash
+        path = os.path.join(cache_dir("assets"), hashlib.blake2b(self.url.encode(), digest_size=16).hexdigest())
+        try:
+            if os.path.exists(path):
+                with open(path, 'rb') as file:
+                    data = file.read()
+            else:
+                with urlopen(self.url, timeout=self.timeout) as response:
+                    data = response.read()
+                temporary = f"{path}.{os.getpid()}.tmp"
+                with open(temporary, 'wb') as file:
+                    file.write(data)
+                os.replace(temporary, path)
+        except Exception as e:
+            print(f"Warning: could not get {self.url}: {e}")
+            return
+        self.signals.loaded.emit(data)
+
+
+@lru_cache(maxsize=None)
+def asset_pool():
+    pool = QThreadPool()
+    pool.setMaxThreadCount(1)
+    return pool
+
+
+def fetch_asset(url, on_loaded, timeout=3.0):
+    """Call on_loaded(bytes) on the GUI thread once a remote asset is available.
+
+    Nothing is called if it can't be had. Keep the returned task until then.
+    """
+    task = RemoteAssetTask(url, timeout)
+    task.signals.loaded.connect(on_loaded)
+    asset_pool().start(task)
+    return task
@@ -0,0 +1,73 @@
+"""
+Savitzky-Golay smoothing for closed polar cuts.
+
+A cut covers the whole circle, so 359 deg and 0 deg are neighbours: the
+filter is applied as a circular convolution instead of fitting polynomials
+on the two ends like scipy's savgol_filter does by default.
+"""
+from functools import lru_cache
+
+import numpy as np
+from scipy.ndimage import convolve1d
+from scipy.signal import savgol_coeffs
+
+# above this window a circular convolution is cheaper through the FFT
+FFT_MIN_WINDOW = 64
+
+
+@lru_cache(maxsize=64)
+def savgol_kernel(window, polyorder):
+    """Convolution coefficients of a Savitzky-Golay smoothing filter"""
+    if window % 2 == 0 or window <= polyorder:
+        raise ValueError(f"window must be odd and greater than polyorder, got {window} and {polyorder}")
+    kernel = savgol_coeffs(window, polyorder)
+    kernel.flags.writeable = False
+    return kernel
+
+
+@lru_cache(maxsize=64)
+def savgol_spectrum(window, polyorder, size):
+    """rFFT of the kernel wrapped around a cut of `size` points"""
+    kernel = savgol_kernel(window, polyorder)
+    wrapped = np.zeros(size)
+    # tap j of the kernel acts on the sample j - window // 2 places away
+    np.add.at(wrapped, (np.arange(window) - window // 2) % size, kernel)
+    spectrum = np.fft.rfft(wrapped)
+    spectrum.flags.writeable = False
+    return spectrum
+
+
+def circular_savgol(block, window, polyorder=2):
+    """Smooth every cut (last axis) of `block` with the ends wrapped around.
+
+    Works on a single cut or on a whole (cuts x angles) block in one call.
+    """
+    block = np.asarray(block, dtype=float)
+    size = block.shape[-1]
+    if window > size:
+        raise ValueError(f"window ({window}) must be less than or equal to the size of the cuts ({size})")
+    if window >= FFT_MIN_WINDOW:
+        spectrum = savgol_spectrum(window, polyorder, size)
+        return np.fft.irfft(np.fft.rfft(block, axis=-1) * spectrum, n=size, axis=-1)
+    return convolve1d(block, savgol_kernel(window, polyorder), axis=-1, mode='wrap')
+
+
+def resample_cuts(block, size):
+    """Resample every cut (last axis) to `size` points spanning the same angles.
+
+    The first and last samples are kept so a closed surface stays closed. When
+    decimating, the cuts are first averaged over the decimation step (circular
+    moving average) so narrow lobes are blended in rather than skipped.
+    """
+    block = np.asarray(block, dtype=float)
+    points = block.shape[-1]
+    if size >= points:
+        return block
+    step = (points - 1) / (size - 1)
+    window = int(step) | 1
+    if window > 1:
+        block = circular_savgol(block, window, polyorder=0)
+    positions = np.arange(size) * step
+    left = np.minimum(positions.astype(int), points - 2)
+    fraction = positions - left
+    return block[..., left] * (1 - fraction) + block[..., left + 1] * fraction
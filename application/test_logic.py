@@ -0,0 +1,30 @@
+"""
+Regression checks of the measurement reader, run with:
+    python -m pytest application
+"""
+import numpy as np
+
+from cache import ParseCache
+from logic import Model
+
+
+def write_cuts(path, cuts):
+    with open(path, 'w') as file:
+        for i, cut in enumerate(cuts):
+            file.write(f"Cut {i}\n")
+            file.write("\n".join(f"{value:.4f}" for value in cut) + "\n")
+    return path
+
+
+def test_cuts_of_different_lengths(tmp_path):
+    h_plane = -10 * np.sin(np.radians(np.arange(360)) / 2) ** 2
+    e_plane = -10 * np.sin(np.radians(np.arange(359) * 360 / 359) / 2) ** 2
+    path = write_cuts(tmp_path / "mixed.atn", [h_plane, e_plane])
+    cache = ParseCache(str(tmp_path / "cache"))
+    for _ in range(2):  # parsed, then read back from the cache
+        model = Model()
+        model.read_file(str(path), cache=cache)
+        assert model.cuts.shape == (2, 360)
+        assert [info["points"] for info in model.cut_info] == [360, 359]
+        assert np.allclose(model.h_plane, h_plane, atol=1e-4)
+        assert np.allclose(model.e_plane, h_plane, atol=1e-3)  # the same pattern, resampled
@@ -4,14 +4,20 @@ from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                               QLabel, QProgressBar, QPushButton)
 from PySide6.QtCore import Qt, QSize, QTimer, Signal, Slot, QSettings, QPropertyAnimation, QEasingCurve
 from PySide6.QtGui import QIcon, QFont, QPainter, QPen, QColor, QBrush, QPainterPath, QPixmap
-from urllib.request import urlopen  # Replace requests with urllib
 from io import BytesIO
 
+from resources import fetch_asset, icon, pixmap
+
+SUN_ICON_URL = "https://hebbkx1anhila5yf.public.blob.vercel-storage.com/sun-spxpyHqsOu5QFIvjTI7NoIrzwZPKTy.png"
+MOON_ICON_URL = "https://hebbkx1anhila5yf.public.blob.vercel-storage.com/moon-AWn88A7paB2J3jXpQHtxyb6oUKin3l.png"
+
 class ThemeManager:
     """Manages application theme (dark/light mode)"""
     def __init__(self):
         self.settings = QSettings("AntennaRay", "AntennaRay")  # Updated name
         self.dark_mode = self.settings.value("dark_mode", False, type=bool)
+        # opt-in: the bundled icons need no network, the original artwork is downloaded once if asked for
+        self.remote_icons = self.settings.value("remote_icons", False, type=bool)
         
         # Define color palettes
         self.light_palette = {
@@ -53,25 +59,25 @@ class ThemeToggleButton(QPushButton):
         self.setFixedSize(48, 48)  # Increased button size
         self.setCursor(Qt.PointingHandCursor)
         
-        # Load icons
-        self.sun_icon = self.load_icon("https://hebbkx1anhila5yf.public.blob.vercel-storage.com/sun-spxpyHqsOu5QFIvjTI7NoIrzwZPKTy.png")
-        self.moon_icon = self.load_icon("https://hebbkx1anhila5yf.public.blob.vercel-storage.com/moon-AWn88A7paB2J3jXpQHtxyb6oUKin3l.png")
+        # Bundled icons, with remote_icons set the original artwork replaces them once it is there
+        self.sun_icon = icon("sun")
+        self.moon_icon = icon("moon")
+        self.icon_tasks = []
+        if theme_manager.remote_icons:
+            self.icon_tasks = [fetch_asset(SUN_ICON_URL, lambda data: self.set_remote_icon("sun_icon", data)),
+                               fetch_asset(MOON_ICON_URL, lambda data: self.set_remote_icon("moon_icon", data))]
         
         self.update_icon()
         
         # Connect the clicked signal
         self.clicked.connect(self.toggle_theme)
     
-    def load_icon(self, url):
-        """Load icon from URL using urllib"""
-        try:
-            response = urlopen(url)
-            pixmap = QPixmap()
-            pixmap.loadFromData(response.read())
-            return QIcon(pixmap)
-        except Exception as e:
-            print(f"Error loading icon: {e}")
-            return QIcon()
+    def set_remote_icon(self, name, data):
+        """Use a downloaded icon instead of the bundled one"""
+        image = QPixmap()
+        if image.loadFromData(data):
+            setattr(self, name, QIcon(image))
+            self.update_icon()
     
     def toggle_theme(self):
         """Toggle the theme and update the icon"""
@@ -116,7 +122,10 @@ class LogoWidget(QWidget):
         painter.drawPath(path)
 
 class SplashScreen(QWidget):
-    """Splash screen with progress bar and theme toggle"""
+    """Splash screen with progress bar and theme toggle.
+
+    The progress follows the startup stages, see set_progress and finish.
+    """
     def __init__(self, on_finish=None):
         super().__init__()
         self.on_finish = on_finish
@@ -145,9 +154,8 @@ class SplashScreen(QWidget):
         
         # Logo from SVG
         logo_label = QLabel()
-        pixmap = QPixmap("logo vertical.svg")  # Ensure this file exists in the same directory or provide the full path
-        pixmap = pixmap.scaled(200, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        logo_label.setPixmap(pixmap)
+        logo = pixmap("logo vertical.svg").scaled(200, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        logo_label.setPixmap(logo)
         logo_label.setAlignment(Qt.AlignCenter)
         main_layout.addWidget(logo_label)
         
@@ -192,11 +200,6 @@ class SplashScreen(QWidget):
         # Connect theme toggle
         self.theme_toggle.clicked.connect(self.apply_theme)
         
-        # Timer for progress simulation
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_progress)
-        self.timer.start(50)
-        
         # Center on screen
         self.center_on_screen()
     
@@ -236,23 +239,22 @@ class SplashScreen(QWidget):
         self.loading_label.setStyleSheet(f"color: {text_secondary};")
         self.progress_label.setStyleSheet(f"color: {text_secondary};")
     
-    def update_progress(self):
-        """Update progress bar value"""
-        current_value = self.progress_bar.value()
-        
-        if current_value < 100:
-            new_value = current_value + 1
-            self.progress_bar.setValue(new_value)
-            self.progress_label.setText(f"{new_value}%")
-        else:
-            self.timer.stop()
-            if self.on_finish:
-                # Start fade-out animation before closing
-                self.start_fade_out()
+    def set_progress(self, value, message=None):
+        """Show how far startup got, painted right away since startup keeps the event loop busy"""
+        self.progress_bar.setValue(value)
+        self.progress_label.setText(f"{value}%")
+        if message:
+            self.loading_label.setText(message)
+        QApplication.processEvents()
+
+    def finish(self):
+        """Startup is done, fade out over the main window that is already shown"""
+        self.set_progress(100, "Ready")
+        self.start_fade_out()
 
     def start_fade_out(self):
         self.fade_anim = QPropertyAnimation(self, b"windowOpacity")
-        self.fade_anim.setDuration(700)
+        self.fade_anim.setDuration(250)
         self.fade_anim.setStartValue(1.0)
         self.fade_anim.setEndValue(0.0)
         self.fade_anim.setEasingCurve(QEasingCurve.InOutQuad)
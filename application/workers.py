@@ -0,0 +1,183 @@
+"""
+Background jobs for the Qt thread pool.
+
+Workers only touch NumPy data and hand their results back through signals,
+the GUI is always updated from the main thread.
+"""
+import os
+from functools import partial
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from logic import Model, smoothing_window
+
+
+class TaskSignals(QObject):
+    progress = Signal(int, str)   # percent, message
+    finished = Signal(object)     # the task result
+    failed = Signal(object)       # the exception raised by the task
+
+
+class ImportTask(QRunnable):
+    """Read a measurement file into a fresh Model and precompute what is shown first.
+
+    `windows` are smoothing windows to cache before the model is handed over
+    (the slider's current one, the 3D one), `resolution_for(points)` the
+    resolution of the 3D surface to build, None to skip it. Progress is
+    reported after every stage.
+    """
+    READ, SMOOTH, SURFACE = 50, 90, 100  # progress at the end of each stage
+
+    def __init__(self, file_path, cache=None, windows=(), resolution_for=None):
+        super().__init__()
+        self.file_path = file_path
+        self.cache = cache
+        self.windows = sorted({window for window in windows if window > 1})
+        self.resolution_for = resolution_for
+        self.cancelled = False
+        self.signals = TaskSignals()
+
+    def cancel(self):
+        """Drop the result, e.g. because the user picked another file"""
+        self.cancelled = True
+
+    def run(self):
+        try:
+            name = os.path.basename(self.file_path)
+            self.signals.progress.emit(0, f"Reading {name}...")
+            model = Model()
+            model.read_file(self.file_path, cache=self.cache, progress=lambda percent, message:
+                            self.signals.progress.emit(percent * self.READ // 100, f"{name}: {message}"))
+            if model.cuts is None:
+                raise ValueError("The file does not contain any measurement.")
+
+            for i, window in enumerate(self.windows):
+                if self.cancelled:
+                    return
+                self.signals.progress.emit(self.READ + (self.SMOOTH - self.READ) * i // len(self.windows),
+                                           f"{name}: smoothing (window {window})...")
+                try:
+                    model.smoothed(window)
+                except ValueError:
+                    break  # window longer than the cuts, so are the next ones
+            if self.resolution_for is not None and not self.cancelled:
+                self.signals.progress.emit(self.SMOOTH, f"{name}: building the 3D surface...")
+                model.data_3D(resolution=self.resolution_for(model.cuts.shape[1]))
+            if self.cancelled:
+                return
+
+            self.signals.progress.emit(100, "Done")
+            self.signals.finished.emit(model)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(e)
+
+
+class SmoothingPrewarmTask(QRunnable):
+    """Fill the smoothing cache for every window the smoothing controls can ask for"""
+    def __init__(self, model, slider_values, extra_windows=()):
+        super().__init__()
+        self.model = model
+        windows = {smoothing_window(value) for value in slider_values} | set(extra_windows)
+        self.windows = sorted(window for window in windows if window > 1)
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        for window in self.windows:
+            if self.cancelled:
+                return
+            try:
+                self.model.smoothed(window)
+            except ValueError:
+                return  # window longer than the cuts, so are the next ones
+
+
+class FunctionTask(QRunnable):
+    """Run `function(value)` on the pool and emit its result"""
+    def __init__(self, function, value):
+        super().__init__()
+        self.function = function
+        self.value = value
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            self.signals.finished.emit(self.function(self.value))
+        except Exception as e:
+            self.signals.failed.emit(e)
+
+
+class RecomputeScheduler(QObject):
+    """Latest-wins recomputation for controls that fire many events, like sliders.
+
+    submit() only records the newest value and restarts a short timer, so a burst
+    of events is coalesced into one computation. `compute(value)` runs on the
+    thread pool; a result that was overtaken by a newer request is dropped and
+    only the newest one reaches `render(value, result)` on the GUI thread.
+    `on_error(error)` gets the failures of the newest request.
+    """
+    def __init__(self, compute, render, on_error=None, delay=30, parent=None):
+        super().__init__(parent)
+        self.compute = compute
+        self.render = render
+        self.on_error = on_error
+        self.generation = 0
+        self.pending = False
+        self.value = None
+        self.queued = None  # last task handed to the pool
+        self.stats = {"requested": 0, "coalesced": 0, "cancelled": 0,
+                      "computed": 0, "dropped": 0, "rendered": 0}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.start_latest)
+
+    def submit(self, value):
+        self.stats["requested"] += 1
+        if self.pending:
+            self.stats["coalesced"] += 1  # replaces a value that was never computed
+        self.pending = True
+        self.value = value
+        self.generation += 1
+        self.timer.start()
+
+    def cancel(self):
+        """Drop the pending and running requests, e.g. because the data they were made for was replaced"""
+        self.pending = False
+        self.timer.stop()
+        self.generation += 1
+        if self.queued is not None and QThreadPool.globalInstance().tryTake(self.queued):
+            self.stats["cancelled"] += 1
+
+    def start_latest(self):
+        self.pending = False
+        # a stale task still waiting for a thread is taken back from the pool
+        if self.queued is not None and QThreadPool.globalInstance().tryTake(self.queued):
+            self.stats["cancelled"] += 1
+        task = FunctionTask(self.compute, self.value)
+        task.setAutoDelete(False)  # kept alive by self.queued for tryTake
+        task.signals.finished.connect(partial(self.finished, self.generation, self.value))
+        task.signals.failed.connect(partial(self.failed, self.generation))
+        self.queued = task
+        QThreadPool.globalInstance().start(task)
+
+    def finished(self, generation, value, result):
+        self.stats["computed"] += 1
+        if generation != self.generation:
+            self.stats["dropped"] += 1
+            return
+        self.stats["rendered"] += 1
+        self.render(value, result)
+
+    def failed(self, generation, error):
+        if generation == self.generation and self.on_error is not None:
+            self.on_error(error)
+
+    def skipped(self):
+        """(recomputes, redraws) avoided so far compared to handling every event"""
+        recomputes = self.stats["coalesced"] + self.stats["cancelled"]
+        redraws = self.stats["requested"] - self.stats["rendered"]
+        return recomputes, redraws